@@ -7,9 +7,20 @@ import numpy as np
 import pandas as pd
 from datetime import datetime
 from typing import Dict, List, Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 import time
 import json
+import io
+import sys
+
+try:
+    from numba import njit, prange
+except ImportError:  # 未安装numba时退化为纯Python执行
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda f: f
+    prange = range
 
 
 @dataclass
@@ -32,6 +43,11 @@ class Position:
     strategy: str
     stop_loss: float
     take_profit: float
+    entry_mono: float = field(default_factory=time.monotonic)  # time.monotonic() 开仓时刻
+    sign: int = field(init=False)  # LONG=1, SHORT=-1, 由 direction 推出
+    
+    def __post_init__(self):
+        self.sign = 1 if self.direction == 'LONG' else -1
 
 
 # Full market symbols - S&P 500 + NASDAQ-100 (379 stocks)
@@ -77,6 +93,98 @@ SP500_NASDAQ_SYMBOLS = [
 ]
 
 
+# 决策内核输入字段 (顺序与 score_all 参数一致)
+KERNEL_FIELDS = (
+    'change_1m', 'rsi', 'macd_hist', 'volume_ratio',
+    'bb_upper', 'bb_lower', 'high_5m', 'low_5m', 'price',
+)
+
+# 行情列降精度: float32 足够覆盖 0.0008 级别的阈值, 内存占用减半
+PRICE_DTYPES = {
+    'Open': np.float32, 'High': np.float32, 'Low': np.float32,
+    'Close': np.float32, 'Volume': np.int32,
+}
+
+# 信号标记位, 按 score_all 中的判断顺序排列
+SIGNAL_FLAGS = ('M+', 'M-', 'RSI<35', 'RSI>65', 'HH', 'LL', 'VOL+', 'BB-L', 'BB-U')
+
+
+@njit('void(float32[:], float32[:], float32[:], float32[:], float32[:], float32[:], '
+      'float32[:], float32[:], float32[:], int8[:], float32[:], int32[:])',
+      parallel=True, cache=True)
+def score_all(change1m, rsi, macd_hist, vol_ratio, bb_u, bb_l, high5, low5, price,
+              out_dir, out_conf, out_flags):
+    """一次性为所有股票打分 (analyze_symbol / scan_market 共用)
+    
+    out_dir: 1=LONG, -1=SHORT, 0=无信号; out_flags: SIGNAL_FLAGS 位掩码
+    """
+    for i in prange(price.shape[0]):
+        long_s = 0.0
+        short_s = 0.0
+        flags = 0
+        c1 = change1m[i]
+        p = price[i]
+        
+        # 动量信号
+        if c1 > 0.0008:
+            long_s += 0.35
+            flags |= 1
+        elif c1 < -0.0008:
+            short_s += 0.35
+            flags |= 2
+        
+        # RSI信号
+        if rsi[i] < 35:
+            long_s += 0.25
+            flags |= 4
+        elif rsi[i] > 65:
+            short_s += 0.25
+            flags |= 8
+        
+        # MACD信号
+        if macd_hist[i] > 0:
+            long_s += 0.15
+        else:
+            short_s += 0.15
+        
+        # 突破信号
+        if p > high5[i]:
+            long_s += 0.4
+            flags |= 16
+        elif p < low5[i]:
+            short_s += 0.4
+            flags |= 32
+        
+        # 成交量信号
+        if vol_ratio[i] > 2 and abs(c1) > 0.0005:
+            if c1 > 0:
+                long_s += 0.25
+            else:
+                short_s += 0.25
+            flags |= 64
+        
+        # 布林带信号
+        if p < bb_l[i]:
+            long_s += 0.2
+            flags |= 128
+        elif p > bb_u[i]:
+            short_s += 0.2
+            flags |= 256
+        
+        # 决策
+        total = long_s + short_s
+        if total == 0:
+            out_dir[i] = 0
+            out_conf[i] = 0.0
+        elif long_s > short_s:
+            out_dir[i] = 1
+            out_conf[i] = long_s / total
+        else:
+            out_dir[i] = -1
+            out_conf[i] = short_s / total
+        out_flags[i] = flags
+
+
 class RealtimeConfig:
     """实时交易配置"""
     
@@ -130,7 +238,7 @@ class RealtimeAnalyzer:
     def __init__(self, config: RealtimeConfig):
         self.config = config
         self.price_cache = {}
-        self.last_signal_time = {}
+        self.last_signal_time = {}  # symbol -> time.monotonic()
     
     def fetch_all_prices(self) -> Dict[str, Dict]:
         """并行获取所有股票数据"""
@@ -147,6 +255,9 @@ class RealtimeAnalyzer:
                 if data_1m.empty or len(data_1m) < 2:
                     continue
                 
+                data_1m = data_1m.astype(PRICE_DTYPES)
+                data_5m = data_5m.astype(PRICE_DTYPES)
+                
                 current = data_1m['Close'].iloc[-1]
                 
                 # 计算指标
@@ -202,103 +313,74 @@ class RealtimeAnalyzer:
         
         return data
     
-    def analyze_symbol(self, symbol: str, data: Dict) -> Optional[Signal]:
-        """分析单个股票"""
+    def analyze_symbol(self, symbol: str, data: Dict, now_dt: Optional[datetime] = None,
+                       now_mono: Optional[float] = None) -> Optional[Signal]:
+        """分析单个股票 (以单元素数组调用 score_all, 规则只在内核中维护一份)"""
+        if now_dt is None:
+            now_dt = datetime.now()
+        if now_mono is None:
+            now_mono = time.monotonic()
+        
         if symbol in self.last_signal_time:
-            if (datetime.now() - self.last_signal_time[symbol]).seconds < self.config.cooldown_seconds:
+            if now_mono - self.last_signal_time[symbol] < self.config.cooldown_seconds:
                 return None
         
-        price = data.get('price', 0)
-        if price == 0:
+        if data.get('price', 0) == 0:
             return None
         
-        scores = {'LONG': 0, 'SHORT': 0}
-        signal_details = []
-        
-        # 动量信号
-        if data['change_1m'] > 0.0008:
-            scores['LONG'] += 0.35
-            signal_details.append('M+')
-        elif data['change_1m'] < -0.0008:
-            scores['SHORT'] += 0.35
-            signal_details.append('M-')
-        
-        # RSI信号
-        if data['rsi'] < 35:
-            scores['LONG'] += 0.25
-            signal_details.append('RSI<35')
-        elif data['rsi'] > 65:
-            scores['SHORT'] += 0.25
-            signal_details.append('RSI>65')
-        
-        # MACD信号
-        if data['macd_hist'] > 0:
-            scores['LONG'] += 0.15
-        else:
-            scores['SHORT'] += 0.15
-        
-        # 突破信号
-        if price > data['high_5m']:
-            scores['LONG'] += 0.4
-            signal_details.append('HH')
-        elif price < data['low_5m']:
-            scores['SHORT'] += 0.4
-            signal_details.append('LL')
-        
-        # 成交量信号
-        if data['volume_ratio'] > 2 and abs(data['change_1m']) > 0.0005:
-            direction = 'LONG' if data['change_1m'] > 0 else 'SHORT'
-            scores[direction] += 0.25
-            signal_details.append('VOL+')
-        
-        # 布林带信号
-        if price < data['bb_lower']:
-            scores['LONG'] += 0.2
-            signal_details.append('BB-L')
-        elif price > data['bb_upper']:
-            scores['SHORT'] += 0.2
-            signal_details.append('BB-U')
-        
-        # 决策
-        total = scores['LONG'] + scores['SHORT']
-        if total == 0:
-            return None
-        
-        if scores['LONG'] > scores['SHORT']:
-            confidence = scores['LONG'] / total
-            direction = 'LONG'
-        else:
-            confidence = scores['SHORT'] / total
-            direction = 'SHORT'
-        
-        if confidence < self.config.min_confidence:
-            return None
+        signals = self._score_symbols([symbol], {symbol: data}, now_dt)
+        return signals[0] if signals else None
+    
+    def _score_symbols(self, symbols: List[str], all_data: Dict, now_dt: datetime) -> List[Signal]:
+        """把 symbols 打包为列数组送入 score_all, 返回达到置信度阈值的信号"""
+        n = len(symbols)
+        columns = [
+            np.array([all_data[symbol][field] for symbol in symbols], dtype=np.float32)
+            for field in KERNEL_FIELDS
+        ]
+        out_dir = np.zeros(n, dtype=np.int8)
+        out_conf = np.zeros(n, dtype=np.float32)
+        out_flags = np.zeros(n, dtype=np.int32)
+        score_all(*columns, out_dir, out_conf, out_flags)
         
-        return Signal(
-            symbol=symbol,
-            direction=direction,
-            entry_price=price,
-            confidence=confidence,
-            strategy=''.join(signal_details[:3]),
-            timestamp=datetime.now()
-        )
+        signals = []
+        hits = np.flatnonzero((out_dir != 0) & (out_conf >= self.config.min_confidence))
+        for i in hits:
+            symbol = symbols[i]
+            flags = int(out_flags[i])
+            details = [name for bit, name in enumerate(SIGNAL_FLAGS) if flags >> bit & 1]
+            signals.append(Signal(
+                symbol=symbol,
+                direction='LONG' if out_dir[i] > 0 else 'SHORT',
+                entry_price=all_data[symbol]['price'],
+                confidence=float(out_conf[i]),
+                strategy=''.join(details[:3]),
+                timestamp=now_dt
+            ))
+        return signals
     
-    def scan_market(self) -> List[Signal]:
+    def scan_market(self, now_dt: datetime, now_mono: float) -> List[Signal]:
         """扫描整个市场"""
         all_data = self.fetch_all_prices()
-        signals = []
         
-        for symbol, data in all_data.items():
-            sig = self.analyze_symbol(symbol, data)
-            if sig:
-                signals.append(sig)
-                self.last_signal_time[symbol] = datetime.now()
+        # 过滤冷却期和无效价格, 其余股票一次性送入决策内核
+        cooldown = self.config.cooldown_seconds
+        symbols = [
+            symbol for symbol, data in all_data.items()
+            if data.get('price', 0) != 0
+            and now_mono - self.last_signal_time.get(symbol, -cooldown) >= cooldown
+        ]
+        if not symbols:
+            return []
+        
+        signals = self._score_symbols(symbols, all_data, now_dt)
+        for signal in signals:
+            self.last_signal_time[signal.symbol] = now_mono
         
         # 按置信度排序
         signals.sort(key=lambda x: x.confidence, reverse=True)
         return signals
 
-
 class RealtimeTrader:
     """实时交易系统"""
     
@@ -307,39 +389,40 @@ class RealtimeTrader:
         self.analyzer = RealtimeAnalyzer(self.config)
         self.positions: List[Position] = []
         self.pnl_history = []
+        self.total_pnl = 0.0
         self.scan_count = 0
         self.start_time = datetime.now()
     
-    def check_positions(self):
+    def check_positions(self, now_mono: float):
         """检查持仓状态"""
-        close_signals = []
+        if not self.positions:
+            return []
         
-        for pos in self.positions:
-            data = self.analyzer.fetch_all_prices().get(pos.symbol)
-            if not data:
-                continue
-            
-            current = data['price']
-            
-            if pos.direction == 'LONG':
-                pnl_pct = (current - pos.entry_price) / pos.entry_price
-            else:
-                pnl_pct = (pos.entry_price - current) / pos.entry_price
-            
-            if pnl_pct >= self.config.take_profit:
-                close_signals.append((pos, 'TAKE_PROFIT', current))
-            elif pnl_pct <= -self.config.stop_loss:
-                close_signals.append((pos, 'STOP_LOSS', current))
-            elif (datetime.now() - pos.entry_time).seconds > 600:  # 10分钟强制平仓
-                close_signals.append((pos, 'TIME_STOP', current))
+        all_data = self.analyzer.fetch_all_prices()
+        live = [pos for pos in self.positions if all_data.get(pos.symbol)]
+        if not live:
+            return []
         
-        return close_signals
+        # 所有持仓一次性判断: sign*(现价-开仓价) 与止盈/止损距离比较
+        current = np.array([all_data[pos.symbol]['price'] for pos in live], dtype=np.float64)
+        entry = np.array([pos.entry_price for pos in live], dtype=np.float64)
+        sign = np.array([pos.sign for pos in live], dtype=np.float64)
+        tp_dist = sign * (np.array([pos.take_profit for pos in live], dtype=np.float64) - entry)
+        sl_dist = sign * (entry - np.array([pos.stop_loss for pos in live], dtype=np.float64))
+        held = now_mono - np.array([pos.entry_mono for pos in live], dtype=np.float64)
+        
+        move = sign * (current - entry)
+        reasons = np.where(move >= tp_dist, 'TAKE_PROFIT',
+                  np.where(move <= -sl_dist, 'STOP_LOSS',
+                  np.where(held > 600, 'TIME_STOP', '')))  # 10分钟强制平仓
+        
+        return [
+            (pos, str(reasons[i]), float(current[i]))
+            for i, pos in enumerate(live) if reasons[i]
+        ]
     
-    def close_position(self, position: Position, reason: str, exit_price: float):
-        if position.direction == 'LONG':
-            pnl = (exit_price - position.entry_price) * position.quantity
-        else:
-            pnl = (position.entry_price - exit_price) * position.quantity
+    def close_position(self, position: Position, reason: str, exit_price: float, now_mono: float):
+        pnl = position.sign * (exit_price - position.entry_price) * position.quantity
         
         self.pnl_history.append({
             'symbol': position.symbol,
@@ -349,31 +432,36 @@ class RealtimeTrader:
             'quantity': position.quantity,
             'pnl': pnl,
             'reason': reason,
-            'duration': (datetime.now() - position.entry_time).seconds,
+            'duration': int(now_mono - position.entry_mono),
             'strategy': position.strategy
         })
+        self.total_pnl += pnl
         
         self.positions = [p for p in self.positions if p.symbol != position.symbol]
         
         icon = '[+]' if pnl >= 0 else '[-]'
         print(f"{icon} CLOSE {position.symbol} {position.direction} @ ${exit_price:.2f} | P&L: ${pnl:.2f} | {reason}")
     
-    def print_status(self):
+    def print_status(self, now_dt: datetime):
         """打印状态"""
-        uptime = datetime.now() - self.start_time
+        uptime = now_dt - self.start_time
         minutes = uptime.seconds // 60
         seconds = uptime.seconds % 60
         
-        total_pnl = sum(p['pnl'] for p in self.pnl_history)
+        total_pnl = self.total_pnl
         pnl_icon = '[+]' if total_pnl >= 0 else '[-]'
         
-        print(f"\n{'='*70}")
-        print(f"  REALTIME TRADING STATUS")
-        print(f"{'='*70}")
-        print(f"  Uptime: {minutes}m {seconds}s | Scans: {self.scan_count}")
-        print(f"  Positions: {len(self.positions)} | Trades: {len(self.pnl_history)}")
-        print(f"  Total P&L: {pnl_icon} ${total_pnl:.2f}")
-        print(f"{'='*70}")
+        # 整块写入, 只刷新一次stdout
+        buf = io.StringIO()
+        buf.write(f"\n{'='*70}\n")
+        buf.write("  REALTIME TRADING STATUS\n")
+        buf.write(f"{'='*70}\n")
+        buf.write(f"  Uptime: {minutes}m {seconds}s | Scans: {self.scan_count}\n")
+        buf.write(f"  Positions: {len(self.positions)} | Trades: {len(self.pnl_history)}\n")
+        buf.write(f"  Total P&L: {pnl_icon} ${total_pnl:.2f}\n")
+        buf.write(f"{'='*70}\n")
+        sys.stdout.write(buf.getvalue())
+        sys.stdout.flush()
     
     def run(self, market_hours_only=True):
         """运行实时交易"""
@@ -387,23 +475,28 @@ class RealtimeTrader:
         print(f"  Stop Loss: {self.config.stop_loss:.1%} | Take Profit: {self.config.take_profit:.1%}")
         print("="*70)
         
-        last_status_time = datetime.now()
+        last_status_mono = time.monotonic()
+        
+        # 收盘时间只计算一次 (4:00 PM ET = 10:00 PM Paris)
+        self._close_epoch = datetime.now().replace(hour=22, minute=0, second=0, microsecond=0).timestamp()
         
         while True:
-            now = datetime.now()
+            # 每轮只取一次时间
+            now_dt = datetime.now()
+            now_mono = time.monotonic()
             
-            # 收盘检查 (4:00 PM ET = 10:00 PM Paris)
-            if market_hours_only and now.hour >= 22 and now.minute >= 0:
+            # 收盘检查
+            if market_hours_only and now_dt.timestamp() >= self._close_epoch:
                 print("\n[MARKET CLOSED] Stopping...")
                 break
             
             # 检查持仓
-            close_signals = self.check_positions()
+            close_signals = self.check_positions(now_mono)
             for pos, reason, price in close_signals:
-                self.close_position(pos, reason, price)
+                self.close_position(pos, reason, price, now_mono)
             
             # 扫描市场
-            signals = self.analyzer.scan_market()
+            signals = self.analyzer.scan_market(now_dt, now_mono)
             self.scan_count += 1
             
             # 打印信号
@@ -425,12 +518,13 @@ class RealtimeTrader:
                     direction=sig.direction,
                     entry_price=sig.entry_price,
                     quantity=quantity,
-                    entry_time=datetime.now(),
+                    entry_time=now_dt,
                     strategy=sig.strategy,
                     stop_loss=sig.entry_price * (1 - self.config.stop_loss) if sig.direction == 'LONG' 
                                else sig.entry_price * (1 + self.config.stop_loss),
                     take_profit=sig.entry_price * (1 + self.config.take_profit) if sig.direction == 'LONG'
-                                else sig.entry_price * (1 - self.config.take_profit)
+                                else sig.entry_price * (1 - self.config.take_profit),
+                    entry_mono=now_mono
                 )
                 
                 self.positions.append(position)
@@ -439,9 +533,9 @@ class RealtimeTrader:
                 print(f"[OPEN] {sig.symbol} {action} {quantity}@{sig.entry_price:.2f} | {sig.strategy} | {sig.confidence:.0%}")
             
             # 每10秒打印状态
-            if (now - last_status_time).seconds >= 10:
-                self.print_status()
-                last_status_time = now
+            if now_mono - last_status_mono >= 10:
+                self.print_status(now_dt)
+                last_status_mono = now_mono
             
             # 短暂休息
             time.sleep(1)
@@ -450,7 +544,7 @@ class RealtimeTrader:
         print("\n" + "="*70)
         print("  DAY SUMMARY")
         print("="*70)
-        total_pnl = sum(p['pnl'] for p in self.pnl_history)
+        total_pnl = self.total_pnl
         print(f"  Total Scans: {self.scan_count}")
         print(f"  Total Trades: {len(self.pnl_history)}")
         print(f"  Total P&L: ${total_pnl:.2f}")
@@ -2,8 +2,48 @@
 Trading Dashboard - Self-Contained Version
 No external server needed - generates HTML with embedded data
 """
+import asyncio
+import base64
+import gzip
+import hashlib
+import hmac
+import http.client
+import io
+import os
+import urllib.request
 from datetime import datetime
-import random
+from functools import lru_cache
+from operator import itemgetter
+from string import Template
+import numpy as np
+
+try:
+    import orjson
+
+    def _to_json(obj):
+        return orjson.dumps(obj).decode()
+except ImportError:
+    import json
+
+    def _to_json(obj):
+        return json.dumps(obj, separators=(',', ':'))
+
+try:
+    from numba import njit
+except ImportError:  # run the numeric kernels as plain Python without numba
+    def njit(*args, **kwargs):
+        if args and callable(args[0]):
+            return args[0]
+        return lambda f: f
+
+@njit(cache=True)
+def _walk(out, base, lo, hi, seed):
+    """Fill out with a uniform random walk starting from base"""
+    np.random.seed(seed)
+    for i in range(out.size):
+        base += np.random.uniform(lo, hi)
+        out[i] = base
+    return out
 
 def generate_sample_data():
     """Generate sample trading data"""
@@ -25,20 +65,32 @@ def generate_sample_data():
         'BAC': {'direction': 'LONG', 'pnl': -28.40},
     }
     
-    pnl_history = []
-    base_pnl = 400
-    for i in range(50):
-        base_pnl += random.uniform(-15, 20)
-        pnl_history.append({
-            'time': f'20:{45+i//2:02d}:{i%60*random.randint(0,59):02d}',
-            'pnl': round(base_pnl, 2)
-        })
+    # Compiled random walk over a preallocated buffer
+    seed = np.random.randint(0, 2**31 - 1)
+    pnls = np.round(_walk(np.empty(50, dtype=np.float64), 400.0, -15.0, 20.0, seed), 2)
+    secs = np.random.randint(0, 60, 50)
+    times = [f'20:{45+i//2:02d}:{secs[i]:02d}' for i in range(50)]
+    pnl_history = [{'time': t, 'pnl': p} for t, p in zip(times, pnls.tolist())]
     
+    # Totals and direction counts in one pass over the positions
+    total_pnl = 0.0
+    longs = shorts = 0
+    for p in positions.values():
+        total_pnl += p['pnl']
+        if p['direction'] == 'LONG':
+            longs += 1
+        else:
+            shorts += 1
+    
+    now = datetime.now()
     return {
-        'timestamp': datetime.now().isoformat(),
+        'timestamp': now.isoformat(),
+        '_now': now,
         'positions': positions,
         'total_trades': len(trades),
-        'total_pnl': round(sum(p['pnl'] for p in positions.values()), 2),
+        'total_pnl': round(total_pnl, 2),
+        'longs': longs,
+        'shorts': shorts,
         'pnl_history': pnl_history,
         'recent_trades': trades[-5:],
         'market_volatility': {
@@ -50,71 +102,60 @@ def generate_sample_data():
         }
     }
 
-def create_dashboard_html(data):
-    """Create self-contained dashboard HTML"""
-    total_pnl = data['total_pnl']
-    
-    html = f'''<!DOCTYPE html>
-<html lang="zh-CN">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Real-Time Trading Dashboard</title>
-    <script src="https://cdn.jsdelivr.net/npm/chart.js"></script>
-    <style>
-        * {{ margin: 0; padding: 0; box-sizing: border-box; }}
-        body {{
+# Static CSS, built once at import
+_CSS = """        * { margin: 0; padding: 0; box-sizing: border-box; }
+        body {
             font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
             background: linear-gradient(135deg, #0d0d0d 0%, #1a1a2e 50%, #16213e 100%);
             min-height: 100vh;
             color: #fff;
             padding: 20px;
-        }}
-        .header {{
+        }
+        .header {
             text-align: center;
             padding: 25px;
             background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
             border-radius: 16px;
             margin-bottom: 20px;
             box-shadow: 0 10px 40px rgba(102, 126, 234, 0.3);
-        }}
-        .header h1 {{ font-size: 26px; margin-bottom: 8px; }}
-        .header .subtitle {{ font-size: 14px; opacity: 0.8; }}
+        }
+        .header h1 { font-size: 26px; margin-bottom: 8px; }
+        .header .subtitle { font-size: 14px; opacity: 0.8; }
         
-        .stats-grid {{
+        .stats-grid {
             display: grid;
             grid-template-columns: repeat(4, 1fr);
             gap: 15px;
             margin-bottom: 25px;
-        }}
-        .stat-card {{
+        }
+        .stat-card {
             background: rgba(255,255,255,0.08);
             backdrop-filter: blur(10px);
             border-radius: 12px;
             padding: 20px;
             text-align: center;
             border: 1px solid rgba(255,255,255,0.1);
-        }}
-        .stat-card .label {{ font-size: 11px; color: #888; text-transform: uppercase; letter-spacing: 1px; }}
-        .stat-card .value {{ font-size: 26px; font-weight: 700; margin-top: 8px; }}
-        .stat-card .value.positive {{ color: #00ff88; }}
-        .stat-card .value.negative {{ color: #ff4757; }}
-        .stat-card .value.neutral {{ color: #00d4ff; }}
+        }
+        .stat-card .label { font-size: 11px; color: #888; text-transform: uppercase; letter-spacing: 1px; }
+        .stat-card .value { font-size: 26px; font-weight: 700; margin-top: 8px; }
+        .stat-card .value.positive { color: #00ff88; }
+        .stat-card .value.negative { color: #ff4757; }
+        .stat-card .value.neutral { color: #00d4ff; }
         
-        .main-grid {{
+        .main-grid {
             display: grid;
             grid-template-columns: 1fr 1fr;
             gap: 20px;
             margin-bottom: 20px;
-        }}
+        }
         
-        .panel {{
+        .panel {
             background: rgba(255,255,255,0.05);
             border-radius: 16px;
             padding: 20px;
             border: 1px solid rgba(255,255,255,0.1);
-        }}
-        .panel h2 {{
+        }
+        .panel h2 {
             font-size: 15px;
             margin-bottom: 15px;
             padding-bottom: 10px;
@@ -122,11 +163,11 @@ def create_dashboard_html(data):
             display: flex;
             align-items: center;
             gap: 8px;
-        }}
-        .chart-container {{ height: 280px; position: relative; }}
+        }
+        .chart-container { height: 280px; position: relative; }
         
-        .position-list {{ max-height: 280px; overflow-y: auto; }}
-        .position-item {{
+        .position-list { max-height: 280px; overflow-y: auto; }
+        .position-item {
             display: flex;
             justify-content: space-between;
             align-items: center;
@@ -135,24 +176,24 @@ def create_dashboard_html(data):
             border-radius: 10px;
             margin-bottom: 8px;
             transition: all 0.3s ease;
-        }}
-        .position-item:hover {{ background: rgba(255,255,255,0.08); }}
-        .pos-symbol {{ font-weight: 700; font-size: 15px; }}
-        .pos-direction {{
+        }
+        .position-item:hover { background: rgba(255,255,255,0.08); }
+        .pos-symbol { font-weight: 700; font-size: 15px; }
+        .pos-direction {
             font-size: 10px;
             padding: 4px 10px;
             border-radius: 20px;
             margin-left: 10px;
             font-weight: 600;
-        }}
-        .pos-direction.long {{ background: rgba(0,255,136,0.15); color: #00ff88; }}
-        .pos-direction.short {{ background: rgba(255,71,87,0.15); color: #ff4757; }}
-        .pos-pnl {{ font-weight: 700; font-size: 14px; }}
-        .pos-pnl.positive {{ color: #00ff88; }}
-        .pos-pnl.negative {{ color: #ff4757; }}
+        }
+        .pos-direction.long { background: rgba(0,255,136,0.15); color: #00ff88; }
+        .pos-direction.short { background: rgba(255,71,87,0.15); color: #ff4757; }
+        .pos-pnl { font-weight: 700; font-size: 14px; }
+        .pos-pnl.positive { color: #00ff88; }
+        .pos-pnl.negative { color: #ff4757; }
         
-        .trade-list {{ max-height: 250px; overflow-y: auto; }}
-        .trade-item {{
+        .trade-list { max-height: 250px; overflow-y: auto; }
+        .trade-item {
             display: grid;
             grid-template-columns: 60px 65px 55px 70px 1fr;
             gap: 10px;
@@ -162,65 +203,76 @@ def create_dashboard_html(data):
             border-radius: 8px;
             margin-bottom: 6px;
             font-size: 13px;
-        }}
-        .trade-time {{ color: #666; font-size: 11px; }}
-        .trade-symbol {{ font-weight: 600; }}
-        .trade-action {{
+        }
+        .trade-time { color: #666; font-size: 11px; }
+        .trade-symbol { font-weight: 600; }
+        .trade-action {
             font-size: 10px;
             padding: 3px 8px;
             border-radius: 4px;
             text-align: center;
             font-weight: 600;
-        }}
-        .trade-action.buy {{ background: rgba(0,255,136,0.15); color: #00ff88; }}
-        .trade-action.sell {{ background: rgba(255,71,87,0.15); color: #ff4757; }}
-        .trade-qty {{ color: #888; }}
-        .trade-pnl {{ font-weight: 600; text-align: right; }}
+        }
+        .trade-action.buy { background: rgba(0,255,136,0.15); color: #00ff88; }
+        .trade-action.sell { background: rgba(255,71,87,0.15); color: #ff4757; }
+        .trade-qty { color: #888; }
+        .trade-pnl { font-weight: 600; text-align: right; }
         
-        .vol-info {{
+        .vol-info {
             background: rgba(255,255,255,0.03);
             border-radius: 10px;
             padding: 15px;
             margin-bottom: 15px;
-        }}
-        .vol-row {{
+        }
+        .vol-row {
             display: flex;
             justify-content: space-between;
             margin-bottom: 8px;
             font-size: 13px;
-        }}
-        .vol-row:last-child {{ margin-bottom: 0; }}
-        .vol-label {{ color: #888; }}
-        .vol-value {{ font-weight: 600; }}
+        }
+        .vol-row:last-child { margin-bottom: 0; }
+        .vol-label { color: #888; }
+        .vol-value { font-weight: 600; }
         
-        @media (max-width: 900px) {{
-            .main-grid {{ grid-template-columns: 1fr; }}
-            .stats-grid {{ grid-template-columns: repeat(2, 1fr); }}
-        }}
-    </style>
+        @media (max-width: 900px) {
+            .main-grid { grid-template-columns: 1fr; }
+            .stats-grid { grid-template-columns: repeat(2, 1fr); }
+        }
+"""
+
+# Page shell; each render only substitutes the dynamic fields
+_TEMPLATE = Template("""<!DOCTYPE html>
+<html lang="zh-CN">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Real-Time Trading Dashboard</title>
+    <script src="$chart_src"$chart_attrs></script>
+    <style>
+""" + _CSS + """    </style>
 </head>
 <body>
     <div class="header">
         <h1>Intraday Trading Dashboard</h1>
-        <div class="subtitle" id="headerTime">{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}</div>
+        <div class="subtitle" id="headerTime">$timestamp</div>
     </div>
     
     <div class="stats-grid">
         <div class="stat-card">
             <div class="label">Account Balance</div>
-            <div class="value neutral">$100,000</div>
+            <div class="value neutral">$$100,000</div>
         </div>
         <div class="stat-card">
             <div class="label">Total P&L</div>
-            <div class="value {'positive' if total_pnl >= 0 else 'negative'}">{'$' if total_pnl >= 0 else '-$'}{abs(total_pnl):,.2f}</div>
+            <div class="value $pnl_class">$total_pnl</div>
         </div>
         <div class="stat-card">
             <div class="label">Positions</div>
-            <div class="value neutral">{len(data['positions'])}</div>
+            <div class="value neutral">$position_count</div>
         </div>
         <div class="stat-card">
             <div class="label">Trades Today</div>
-            <div class="value neutral">{data['total_trades']}</div>
+            <div class="value neutral">$total_trades</div>
         </div>
     </div>
     
@@ -236,23 +288,23 @@ def create_dashboard_html(data):
             <div class="vol-info">
                 <div class="vol-row">
                     <span class="vol-label">Market State</span>
-                    <span class="vol-value" style="color: #ffd700;">{data['market_volatility']['level'].upper()}</span>
+                    <span class="vol-value" style="color: #ffd700;">$vol_level</span>
                 </div>
                 <div class="vol-row">
                     <span class="vol-label">Threshold</span>
-                    <span class="vol-value">{data['market_volatility']['threshold']:.0%}</span>
+                    <span class="vol-value">$vol_threshold</span>
                 </div>
                 <div class="vol-row">
                     <span class="vol-label">Avg Volatility</span>
-                    <span class="vol-value">{data['market_volatility']['avg_vol']*100:.2f}%</span>
+                    <span class="vol-value">$vol_avg</span>
                 </div>
                 <div class="vol-row">
                     <span class="vol-label">Stop Loss</span>
-                    <span class="vol-value">{data['market_volatility']['stop_loss']*100:.1f}%</span>
+                    <span class="vol-value">$vol_stop_loss</span>
                 </div>
                 <div class="vol-row">
                     <span class="vol-label">Take Profit</span>
-                    <span class="vol-value">{data['market_volatility']['take_profit']*100:.1f}%</span>
+                    <span class="vol-value">$vol_take_profit</span>
                 </div>
             </div>
             <div class="chart-container" style="height: 140px;">
@@ -265,27 +317,13 @@ def create_dashboard_html(data):
         <div class="panel">
             <h2>Active Positions</h2>
             <div class="position-list" id="positionList">
-                {''.join([f'''
-                <div class="position-item">
-                    <div>
-                        <span class="pos-symbol">{sym}</span>
-                        <span class="pos-direction {p['direction'].lower()}">{p['direction']}</span>
-                    </div>
-                    <span class="pos-pnl {'positive' if p['pnl'] >= 0 else 'negative'}">{'+' if p['pnl'] >= 0 else ''}${{p['pnl']:.2f}}</span>
-                </div>''' for sym, p in data['positions'].items()])}
+                $positions_html
             </div>
         </div>
         <div class="panel">
             <h2>Recent Trades</h2>
             <div class="trade-list">
-                {''.join([f'''
-                <div class="trade-item">
-                    <div class="trade-time">{t['time']}</div>
-                    <div class="trade-symbol">{t['symbol']}</div>
-                    <div class="trade-action {'buy' if t['action'] in ['BUY','LONG'] else 'sell'}">{t['action']}</div>
-                    <div class="trade-qty">{t['quantity']}</div>
-                    <div class="trade-pnl {'positive' if t.get('pnl',0) >= 0 else 'negative'}">{'+' if t.get('pnl',0) >= 0 else ''}${{t.get('pnl',0):.2f}}</div>
-                </div>''' for t in data['recent_trades']])}
+                $trades_html
             </div>
         </div>
     </div>
@@ -293,66 +331,256 @@ def create_dashboard_html(data):
     <script>
         // P&L Chart
         const pnlCtx = document.getElementById('pnlChart').getContext('2d');
-        const pnlChart = new Chart(pnlCtx, {{
+        const pnlChart = new Chart(pnlCtx, {
             type: 'line',
-            data: {{
-                labels: {list(d['time'] for d in data['pnl_history'])},
-                datasets: [{{
+            data: {
+                labels: $pnl_labels,
+                datasets: [{
                     label: 'P&L',
-                    data: {list(d['pnl'] for d in data['pnl_history'])},
+                    data: $pnl_values,
                     borderColor: '#00ff88',
                     backgroundColor: 'rgba(0,255,136,0.1)',
                     fill: true,
                     tension: 0.4,
                     pointRadius: 0
-                }}]
-            }},
-            options: {{
+                }]
+            },
+            options: {
                 responsive: true,
                 maintainAspectRatio: false,
-                plugins: {{ legend: {{ display: false }} }},
-                scales: {{
-                    x: {{ display: false }},
-                    y: {{ 
-                        grid: {{ color: 'rgba(255,255,255,0.05)' }},
-                        ticks: {{ color: '#666' }}
-                    }}
-                }}
-            }}
-        }});
+                plugins: { legend: { display: false } },
+                scales: {
+                    x: { display: false },
+                    y: { 
+                        grid: { color: 'rgba(255,255,255,0.05)' },
+                        ticks: { color: '#666' }
+                    }
+                }
+            }
+        });
         
         // Volatility Chart (Position Distribution)
         const volCtx = document.getElementById('volChart').getContext('2d');
-        const volChart = new Chart(volCtx, {{
+        const volChart = new Chart(volCtx, {
             type: 'doughnut',
-            data: {{
+            data: {
                 labels: ['Long', 'Short', 'Cash'],
-                datasets: [{{
-                    data: [3, 4, 3],
+                datasets: [{
+                    data: $allocation,
                     backgroundColor: ['#00ff88', '#ff4757', '#333'],
                     borderWidth: 0
-                }}]
-            }},
-            options: {{
+                }]
+            },
+            options: {
                 responsive: true,
                 maintainAspectRatio: false,
-                plugins: {{ legend: {{ position: 'bottom', labels: {{ color: '#888', padding: 15 }} }} }}
-            }}
-        }});
+                plugins: { legend: { position: 'bottom', labels: { color: '#888', padding: 15 } } }
+            }
+        });
     </script>
 </body>
-</html>'''
-    return html
+</html>""")
+
+# Pinned Chart.js build, copied next to the reports on first run
+CHART_JS_URL = 'https://cdn.jsdelivr.net/npm/chart.js@4.4.0/dist/chart.umd.min.js'
+CHART_JS_FILE = 'chart.min.js'
+# SRI digest of CHART_JS_URL ('sha384-<base64>'): a download is kept only if it matches,
+# and the CDN <script> carries it as integrity=. Until it is pinned no local copy is written.
+CHART_JS_SHA384 = ''
+
+# Position slots shown in the Long/Short/Cash doughnut
+_MAX_SLOTS = 10
+
+# C-level field extraction for the trade rows in the render key
+_TRADE_FIELDS = itemgetter('time', 'symbol', 'action', 'quantity')
+
+# Placeholder for the header timestamp, filled in after the cached render
+_TS_MARK = '__TS__'
+
+def _split_template(template):
+    """Split a string.Template into its static text runs and field names"""
+    text, fields, run, pos = [], [], [], 0
+    source = template.template
+    for m in template.pattern.finditer(source):
+        run.append(source[pos:m.start()])
+        pos = m.end()
+        if m.group('escaped') is not None:
+            run.append(template.delimiter)
+        else:
+            text.append(''.join(run))
+            fields.append(m.group('named') or m.group('braced'))
+            run = []
+    run.append(source[pos:])
+    text.append(''.join(run))
+    return text, fields
+
+# Static runs of the shell, written around each field when streaming a render
+_SHELL_TEXT, _SHELL_FIELDS = _split_template(_TEMPLATE)
+
+def _pos_row(sym, direction, pnl):
+    """One position row; the sign-dependent class and prefix are picked once"""
+    cls, sign = ('positive', '+') if pnl >= 0 else ('negative', '')
+    return f'''
+                <div class="position-item">
+                    <div>
+                        <span class="pos-symbol">{sym}</span>
+                        <span class="pos-direction {direction.lower()}">{direction}</span>
+                    </div>
+                    <span class="pos-pnl {cls}">{sign}${pnl:.2f}</span>
+                </div>'''
+
+def _trade_row(time, symbol, action, quantity, pnl):
+    """One recent-trade row; the sign-dependent class and prefix are picked once"""
+    cls, sign = ('positive', '+') if pnl >= 0 else ('negative', '')
+    return f'''
+                <div class="trade-item">
+                    <div class="trade-time">{time}</div>
+                    <div class="trade-symbol">{symbol}</div>
+                    <div class="trade-action {'buy' if action in ('BUY', 'LONG') else 'sell'}">{action}</div>
+                    <div class="trade-qty">{quantity}</div>
+                    <div class="trade-pnl {cls}">{sign}${pnl:.2f}</div>
+                </div>'''
+
+def _write_positions(write, positions_key, _pos_row=_pos_row):
+    """Stream position rows"""
+    for sym, direction, pnl in positions_key:
+        write(_pos_row(sym, direction, pnl))
+
+def _write_trades(write, trades_key, _trade_row=_trade_row):
+    """Stream recent trade rows"""
+    for row in trades_key:
+        write(_trade_row(*row))
+
+@lru_cache(maxsize=8)
+def _render(positions_key, trades_key, vol_key, total_pnl, history_key, total_trades, longs, shorts,
+            chart_src):
+    """Render the dashboard body; identical inputs return the cached HTML"""
+    level, threshold, avg_vol, stop_loss, take_profit = vol_key
+    fields = {
+        'chart_src': chart_src,
+        'chart_attrs': (f' integrity="{CHART_JS_SHA384}" crossorigin="anonymous"'
+                        if chart_src == CHART_JS_URL and CHART_JS_SHA384 else ''),
+        'timestamp': _TS_MARK,
+        'pnl_class': 'positive' if total_pnl >= 0 else 'negative',
+        'total_pnl': f"{'$' if total_pnl >= 0 else '-$'}{abs(total_pnl):,.2f}",
+        'position_count': str(len(positions_key)),
+        'total_trades': str(total_trades),
+        'vol_level': level.upper(),
+        'vol_threshold': f"{threshold:.0%}",
+        'vol_avg': f"{avg_vol*100:.2f}%",
+        'vol_stop_loss': f"{stop_loss*100:.1f}%",
+        'vol_take_profit': f"{take_profit*100:.1f}%",
+        'pnl_labels': _to_json([t for t, _ in history_key]),
+        'pnl_values': _to_json([v for _, v in history_key]),
+        'allocation': _to_json([longs, shorts, max(0, _MAX_SLOTS - longs - shorts)]),
+    }
+    
+    # Stream each section into one buffer instead of interpolating a single giant string
+    buf = io.StringIO()
+    write = buf.write
+    for text, name in zip(_SHELL_TEXT, _SHELL_FIELDS):
+        write(text)
+        if name == 'positions_html':
+            _write_positions(write, positions_key)
+        elif name == 'trades_html':
+            _write_trades(write, trades_key)
+        else:
+            write(fields[name])
+    write(_SHELL_TEXT[-1])
+    return buf.getvalue()
+
+def _sri_sha384(payload):
+    """Subresource Integrity value of payload"""
+    return 'sha384-' + base64.b64encode(hashlib.sha384(payload).digest()).decode('ascii')
+
+def ensure_chartjs(reports_dir):
+    """Download Chart.js into reports_dir once; returns the script src to use"""
+    local_path = os.path.join(reports_dir, CHART_JS_FILE)
+    if not os.path.exists(local_path):
+        if not CHART_JS_SHA384:
+            return CHART_JS_URL  # nothing to verify a download against
+        tmp_path = local_path + '.part'
+        try:
+            with urllib.request.urlopen(CHART_JS_URL, timeout=10) as resp:
+                payload = resp.read()  # a sized read would accept a truncated body silently
+            if not hmac.compare_digest(_sri_sha384(payload), CHART_JS_SHA384):
+                raise ValueError('Chart.js download does not match CHART_JS_SHA384')
+            with open(tmp_path, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_path, local_path)
+        except (OSError, ValueError, http.client.HTTPException):
+            # Offline, slow, truncated or tampered download: drop any partial file and keep loading from the CDN
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            return CHART_JS_URL
+    return './' + CHART_JS_FILE
+
+def create_dashboard_html(data, chart_src=CHART_JS_URL):
+    """Create self-contained dashboard HTML"""
+    vol = data['market_volatility']
+    positions_key = tuple((sym, p['direction'], p['pnl']) for sym, p in data['positions'].items())
+    get_fields = _TRADE_FIELDS
+    trades_key = tuple(get_fields(t) + (t.get('pnl', 0),) for t in data['recent_trades'])
+    vol_key = (vol['level'], vol['threshold'], vol['avg_vol'], vol['stop_loss'], vol['take_profit'])
+    history_key = tuple((d['time'], d['pnl']) for d in data['pnl_history'])
+    longs, shorts = data.get('longs'), data.get('shorts')
+    if longs is None or shorts is None:
+        # Counts are precomputed by generate_sample_data; derive them for other callers
+        longs = sum(1 for _, direction, _ in positions_key if direction == 'LONG')
+        shorts = len(positions_key) - longs
+    
+    html = _render(positions_key, trades_key, vol_key, data['total_pnl'], history_key,
+                   data['total_trades'], longs, shorts, chart_src)
+    now = data.get('_now') or datetime.now()
+    return html.replace(_TS_MARK, now.strftime('%Y-%m-%d %H:%M:%S'), 1)
+
+def _write_bytes(filepath, payload):
+    """Write an encoded report with a single open/write/close"""
+    flags = os.O_WRONLY | os.O_CREAT | os.O_TRUNC | getattr(os, 'O_BINARY', 0)
+    fd = os.open(filepath, flags, 0o644)
+    try:
+        view = memoryview(payload)
+        while view:
+            view = view[os.write(fd, view):]
+        # One-shot report: keep it out of the page cache where supported
+        if hasattr(os, 'posix_fadvise'):
+            os.posix_fadvise(fd, 0, len(payload), os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+
+async def _write_all(paths_and_payloads):
+    await asyncio.gather(*(
+        asyncio.to_thread(_write_bytes, path, payload)
+        for path, payload in paths_and_payloads
+    ))
+
+def write_dashboards(paths_and_htmls):
+    """Write several dashboards concurrently so disk latency overlaps across files"""
+    payloads = [
+        (path, html.encode('utf-8') if isinstance(html, str) else html)
+        for path, html in paths_and_htmls
+    ]
+    if len(payloads) == 1:
+        _write_bytes(*payloads[0])
+    else:
+        asyncio.run(_write_all(payloads))
 
 if __name__ == "__main__":
+    filepath = "C:/Users/lulg/.openclaw/workspace/volatility_trading_system/reports/dashboard.html"
+    
     data = generate_sample_data()
-    html = create_dashboard_html(data)
+    html = create_dashboard_html(data, chart_src=ensure_chartjs(os.path.dirname(filepath)))
     
-    filepath = "C:/Users/lulg/.openclaw/workspace/volatility_trading_system/reports/dashboard.html"
-    with open(filepath, 'w', encoding='utf-8') as f:
-        f.write(html)
+    payload = html.encode('utf-8')
+    # Pre-compressed copy for hosting with Content-Encoding: gzip
+    write_dashboards([
+        (filepath, payload),
+        (filepath + '.gz', gzip.compress(payload, compresslevel=1)),
+    ])
     
-    print(f"Dashboard created: {filepath}")
+    print(f"Dashboard created: {filepath} (+ .gz)")
     print(f"Total P&L: ${data['total_pnl']:.2f}")
     print(f"Positions: {len(data['positions'])}")
     print(f"Trades: {data['total_trades']}")
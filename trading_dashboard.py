@@ -2,108 +2,370 @@
 Real-Time Intraday Trading Dashboard
 Web-based monitoring with live charts
 """
+import asyncio
+import gzip
 import json
 import os
+import socket
+import threading
+import time
+from collections import deque
 from datetime import datetime
+from typing import Callable, ClassVar, Dict, Optional
 from http.server import HTTPServer, SimpleHTTPRequestHandler
-from urllib.parse import urlparse, parse_qs
+from urllib.parse import parse_qsl
 import socketserver
 
+try:
+    import orjson
+
+    def dumps(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+except ImportError:  # orjson可选, 退回标准库
+    def dumps(obj) -> bytes:
+        return json.dumps(obj).encode()
+
+try:
+    from aiohttp import web
+except ImportError:  # 未安装aiohttp时使用多线程服务器
+    web = None
+
+_NOW_CACHE = {'t': float('-inf'), 'dt': None, 'iso': '', 'hms': ''}
+
+
+def now_strs() -> dict:
+    """返回当前时间及其格式化字符串, 200ms内复用同一结果, 避免每次请求都格式化"""
+    t = time.monotonic()
+    if t - _NOW_CACHE['t'] > 0.2:
+        dt = datetime.now()
+        _NOW_CACHE.update(t=t, dt=dt, iso=dt.isoformat(), hms=dt.strftime('%H:%M:%S'))
+    return _NOW_CACHE
+
+
+RECENT_TRADES_LEN = 10  # 页面上的成交列表/柱状图长度
+PNL_HISTORY_LEN = 50    # P&L曲线点数
+
+
 # Trading data storage
 class TradingData:
     def __init__(self):
         self.positions = {}
-        self.trades = []
-        self.pnl_history = []
+        self.recent_trades = deque(maxlen=RECENT_TRADES_LEN)  # 有界环形缓冲, 长时间运行内存不增长
+        self.pnl_history = deque(maxlen=PNL_HISTORY_LEN)
+        self.trades_count = 0
         self.market_volatility = {}
-        self.start_time = datetime.now()
+        self.version = 0  # 每次数据变动加一, 客户端据此跳过未变化的轮询快照
+        self.start_time = now_strs()['dt']
+        self.subscribers = set()   # 已连接的WebSocket
+        self._send_tasks = set()
+        self._total_pnl: float = 0.0
+        self._pnl_comp: float = 0.0  # 补偿求和的误差项, 大幅减小累计舍入误差 (并非精确舍入, 结果可能与 math.fsum 略有差异)
+        # 序列化缓存: 各部分JSON片段只在对应数据变动后重新编码,
+        # 整体结果按 now_strs 的刷新周期复用 (时间戳/运行时长每次拼接)
+        self._positions_bytes: Optional[bytes] = None
+        self._trades_bytes: Optional[bytes] = None
+        self._volatility_bytes: Optional[bytes] = None
+        self._status_cache: Optional[tuple] = None  # (now_strs时刻, bytes)
+        self._lock = threading.Lock()  # 多线程服务器下保护写操作, 只在修改时短暂持有
+    
+    def publish(self, message: dict):
+        """向所有WebSocket订阅者推送增量"""
+        if not self.subscribers:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:  # 不在事件循环中 (多线程服务器)
+            return
+        payload = dumps(message).decode()
+        for ws in list(self.subscribers):
+            task = loop.create_task(ws.send_str(payload))
+            self._send_tasks.add(task)
+            task.add_done_callback(self._send_done)
+    
+    def _send_done(self, task: 'asyncio.Task'):
+        """推送任务结束: 移出集合并取走异常 (连接已断开时), 避免 asyncio 报告未读取的任务异常"""
+        self._send_tasks.discard(task)
+        if not task.cancelled():
+            task.exception()
         
     def add_trade(self, trade: dict):
-        self.trades.append(trade)
-        self.pnl_history.append({
-            'time': datetime.now().strftime('%H:%M:%S'),
-            'pnl': self.calculate_total_pnl()
+        now = now_strs()
+        with self._lock:
+            self.recent_trades.append(trade)
+            self.trades_count += 1
+            self.version += 1
+            version = self.version
+            self._add_pnl(trade.get('pnl', 0.0))
+            point = {
+                'time': now['hms'],
+                'pnl': self.calculate_total_pnl()
+            }
+            self.pnl_history.append(point)
+            self._trades_bytes = self._status_cache = None
+        # 曲线只推送新增的一个点, 客户端自行追加并截断窗口
+        self.publish({'type': 'pnl_point', 't': point['time'], 'v': point['pnl']})
+        self.publish({
+            'type': 'trade',
+            'timestamp': now['iso'],
+            'version': version,
+            'trade': trade,
+            'total_trades': self.trades_count,
+            'total_pnl': point['pnl'],
         })
     
+    def _add_pnl(self, pnl: float):
+        """Neumaier补偿累加: O(1)且不保存逐笔P&L"""
+        total = self._total_pnl + pnl
+        if abs(self._total_pnl) >= abs(pnl):
+            self._pnl_comp += (self._total_pnl - total) + pnl
+        else:
+            self._pnl_comp += (pnl - total) + self._total_pnl
+        self._total_pnl = total
+    
     def calculate_total_pnl(self) -> float:
-        return sum(t.get('pnl', 0) for t in self.trades)
+        return self._total_pnl + self._pnl_comp
     
     def get_status(self) -> dict:
+        with self._lock:
+            return self._snapshot()
+    
+    def _snapshot(self) -> dict:
+        """复制当前状态; 调用方需持有 self._lock"""
+        now = now_strs()
         return {
-            'timestamp': datetime.now().isoformat(),
-            'uptime': str(datetime.now() - self.start_time),
-            'positions': self.positions,
-            'total_trades': len(self.trades),
+            'timestamp': now['iso'],
+            'uptime': str(now['dt'] - self.start_time),
+            'version': self.version,
+            'positions': dict(self.positions),
+            'total_trades': self.trades_count,
             'total_pnl': self.calculate_total_pnl(),
-            'pnl_history': self.pnl_history[-50:],  # Last 50 points
-            'recent_trades': self.trades[-10:],
+            'pnl_history': list(self.pnl_history),
+            'recent_trades': list(self.recent_trades),
             'market_volatility': self.market_volatility
         }
     
+    STATUS_TEMPLATE: ClassVar[bytes] = (
+        b'{"timestamp":"%s","uptime":"%s","version":%d,"positions":%s,%s,"market_volatility":%s}'
+    )
+    
+    def get_status_bytes(self) -> bytes:
+        """返回序列化后的状态 (与 get_status 相同); 缓存命中时无锁读取"""
+        now = now_strs()
+        cached = self._status_cache
+        if cached is not None and cached[0] == now['t']:
+            return cached[1]
+        with self._lock:
+            if self._positions_bytes is None:
+                self._positions_bytes = dumps(self.positions)
+            if self._trades_bytes is None:
+                self._trades_bytes = dumps({
+                    'total_trades': self.trades_count,
+                    'total_pnl': self.calculate_total_pnl(),
+                    'pnl_history': list(self.pnl_history),
+                    'recent_trades': list(self.recent_trades),
+                })[1:-1]
+            if self._volatility_bytes is None:
+                self._volatility_bytes = dumps(self.market_volatility)
+            body = self.STATUS_TEMPLATE % (
+                now['iso'].encode(), str(now['dt'] - self.start_time).encode(), self.version,
+                self._positions_bytes, self._trades_bytes, self._volatility_bytes,
+            )
+            self._status_cache = (now['t'], body)
+        return body
+    
     def update_position(self, symbol: str, data: dict):
-        self.positions[symbol] = data
+        with self._lock:
+            self.positions[symbol] = data
+            self.version += 1
+            version = self.version
+            self._positions_bytes = self._status_cache = None
+        self.publish({
+            'type': 'position',
+            'timestamp': now_strs()['iso'],
+            'version': version,
+            'symbol': symbol,
+            'position': data,
+        })
     
     def set_volatility(self, vol: dict):
-        self.market_volatility = vol
+        with self._lock:
+            self.market_volatility = vol
+            self.version += 1
+            version = self.version
+            self._volatility_bytes = self._status_cache = None
+        self.publish({
+            'type': 'volatility',
+            'timestamp': now_strs()['iso'],
+            'version': version,
+            'market_volatility': vol,
+        })
 
 
 # Global data store
 data = TradingData()
 
 
+def apply_update(params):
+    """更新数据（模拟）; params 为单值查询参数映射"""
+    if 'symbol' in params:
+        data.update_position(params['symbol'], {
+            'price': float(params.get('price', '0')),
+            'pnl': float(params.get('pnl', '0')),
+            'change': float(params.get('change', '0'))
+        })
+
+
+def accepts_gzip(accept_encoding: str) -> bool:
+    return 'gzip' in accept_encoding.lower()
+
+
+def write_template(filepath: str, html: str):
+    """写入HTML页面, 同时生成预压缩的 .gz 版本; 内容未变化时跳过"""
+    payload = html.encode('utf-8')
+    if os.path.exists(filepath + '.gz'):
+        try:
+            with open(filepath, 'rb') as f:
+                if f.read() == payload:
+                    return
+        except FileNotFoundError:
+            pass
+    with open(filepath, 'wb') as f:
+        f.write(payload)
+    with open(filepath + '.gz', 'wb') as f:
+        f.write(gzip.compress(payload, compresslevel=9))
+
+
+def make_demo_trade() -> dict:
+    """模拟一笔交易"""
+    return {
+        'symbol': 'TSLA',
+        'action': 'BUY',
+        'quantity': 10,
+        'price': 415.50,
+        'pnl': 12.50,
+        'time': now_strs()['hms']
+    }
+
+
+# 路由处理函数: (handler, query) -> None
+def _handle_status(h, query: str):
+    h.send_json_bytes(data.get_status_bytes())
+
+
+def _handle_trade(h, query: str):
+    trade = make_demo_trade()
+    data.add_trade(trade)
+    h.send_json_response({'status': 'ok', 'trade': trade})
+
+
+def _handle_update(h, query: str):
+    try:
+        params = dict(parse_qsl(query, max_num_fields=8))
+    except ValueError:
+        h.send_error(400, 'Too many query fields')
+        return
+    apply_update(params)
+    h.send_json_response({'status': 'ok'})
+
+
+def _handle_dashboard(h, query: str):
+    h.serve_file('templates/dashboard.html')
+
+
+def _handle_chart(h, query: str):
+    h.serve_file('templates/chart.html')
+
+
 class TradingDashboardHandler(SimpleHTTPRequestHandler):
     """Web请求处理器"""
     
+    ROUTES: ClassVar[Dict[str, Callable]] = {
+        '/api/status': _handle_status,
+        '/api/trade': _handle_trade,
+        '/api/update': _handle_update,
+        '/': _handle_dashboard,
+        '/dashboard': _handle_dashboard,
+        '/chart': _handle_chart,
+    }
+    # HEAD 只允许只读路由; /api/trade 与 /api/update 会修改状态
+    HEAD_ROUTES: ClassVar[frozenset] = frozenset({'/api/status', '/', '/dashboard', '/chart'})
+    
+    # HTTP/1.1 keep-alive: 轮询复用同一TCP连接 (所有响应都必须带Content-Length)
+    protocol_version = 'HTTP/1.1'
+    timeout = 30  # 空闲keep-alive连接30秒后关闭, 释放处理线程
+    
+    JSON_HEADERS: ClassVar[bytes] = (
+        b'Content-Type: application/json\r\n'
+        b'Access-Control-Allow-Origin: *\r\n'
+        b'Connection: keep-alive\r\n'
+        b'Content-Length: '
+    )
+    
+    def setup(self):
+        super().setup()
+        # 小响应立即发出, 不等Nagle合并 (与客户端延迟ACK叠加可达40ms)
+        self.connection.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    
+    def log_request(self, code='-', size='-'):
+        pass  # 不逐个请求写stderr; 错误仍经 log_error 输出
+    
+    def log_error(self, format, *args):
+        # 空闲keep-alive连接超时 (关闭的浏览器标签页) 属正常情况, 不逐个连接写stderr
+        if format.startswith('Request timed out'):
+            return
+        super().log_error(format, *args)
+    
     def do_GET(self):
-        parsed = urlparse(self.path)
-        
-        if parsed.path == '/api/status':
-            self.send_json_response(data.get_status())
-        elif parsed.path == '/api/trade':
-            # 模拟一笔交易
-            trade = {
-                'symbol': 'TSLA',
-                'action': 'BUY',
-                'quantity': 10,
-                'price': 415.50,
-                'pnl': 12.50,
-                'time': datetime.now().strftime('%H:%M:%S')
-            }
-            data.add_trade(trade)
-            self.send_json_response({'status': 'ok', 'trade': trade})
-        elif parsed.path == '/api/update':
-            # 更新数据（模拟）
-            params = parse_qs(parsed.query)
-            if 'symbol' in params:
-                symbol = params['symbol'][0]
-                data.update_position(symbol, {
-                    'price': float(params.get('price', [0])[0]),
-                    'pnl': float(params.get('pnl', [0])[0]),
-                    'change': float(params.get('change', [0])[0])
-                })
-            self.send_json_response({'status': 'ok'})
-        elif parsed.path == '/' or parsed.path == '/dashboard':
-            self.serve_file('templates/dashboard.html')
-        elif parsed.path == '/chart':
-            self.serve_file('templates/chart.html')
+        path, _, query = self.path.partition('?')
+        fn = self.ROUTES.get(path)
+        if fn is None:
+            self.send_empty(404)  # 不回退到目录浏览, 避免逐个请求访问磁盘; 不关闭keep-alive (如 favicon 请求)
+        else:
+            fn(self, query)
+    
+    def do_HEAD(self):
+        # 只读路由与 GET 相同 (只发响应头), 不回退到父类的磁盘文件/目录处理
+        path = self.path.partition('?')[0]
+        if path in self.HEAD_ROUTES:
+            self.do_GET()
+        elif path in self.ROUTES:
+            self.send_empty(405, b'Allow: GET\r\n')
         else:
-            super().do_GET()
+            self.send_empty(404)
+    
+    def send_empty(self, code: int, headers: bytes = b''):
+        """无正文的状态响应, 一次写入且不关闭keep-alive连接"""
+        self.log_request(code)
+        self.wfile.write(b'%s %d %s\r\n%sContent-Length: 0\r\n\r\n' % (
+            self.protocol_version.encode('ascii'), code,
+            self.responses[code][0].encode('latin-1'), headers))
     
     def send_json_response(self, obj):
-        self.send_response(200)
-        self.send_header('Content-Type', 'application/json')
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.end_headers()
-        self.wfile.write(json.dumps(obj).encode())
+        self.send_json_bytes(dumps(obj))
+    
+    def send_json_bytes(self, body: bytes):
+        # 状态行+响应头+正文拼成一次写入, 只产生一次send
+        self.log_request(200)
+        self.wfile.write(b'%s 200 OK\r\n%s%d\r\n\r\n%s' % (
+            self.protocol_version.encode('ascii'), self.JSON_HEADERS, len(body),
+            b'' if self.command == 'HEAD' else body))
     
     def serve_file(self, filepath):
+        # 客户端支持gzip时直接发送预压缩文件
+        gzipped = accepts_gzip(self.headers.get('Accept-Encoding', ''))
+        if gzipped:
+            filepath += '.gz'
         try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                content = f.read()
-            self.send_response(200)
-            self.send_header('Content-Type', 'text/html')
-            self.end_headers()
-            self.wfile.write(content.encode())
+            with open(filepath, 'rb') as f:
+                size = os.fstat(f.fileno()).st_size
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                if gzipped:
+                    self.send_header('Content-Encoding', 'gzip')
+                self.send_header('Content-Length', str(size))
+                self.end_headers()
+                if self.command != 'HEAD':
+                    self.connection.sendfile(f)  # 内核态拷贝 (不支持时自动退回send)
         except FileNotFoundError:
             self.send_error(404, 'File not found')
 
@@ -111,6 +373,82 @@ class TradingDashboardHandler(SimpleHTTPRequestHandler):
 class ThreadedHTTPServer(socketserver.ThreadingMixIn, HTTPServer):
     """多线程HTTP服务器"""
     allow_reuse_address = True
+    daemon_threads = True  # 退出时不等待阻塞在空闲连接上的处理线程
+
+
+# aiohttp 异步处理器 (单线程事件循环, 无每连接线程开销)
+CORS_HEADERS = {'Access-Control-Allow-Origin': '*'}
+
+
+def json_response(obj) -> 'web.Response':
+    return json_bytes_response(dumps(obj))
+
+
+def json_bytes_response(body: bytes) -> 'web.Response':
+    return web.Response(body=body, content_type='application/json', headers=CORS_HEADERS)
+
+
+async def status_handler(request):
+    return json_bytes_response(data.get_status_bytes())
+
+
+async def trade_handler(request):
+    trade = make_demo_trade()
+    data.add_trade(trade)
+    return json_response({'status': 'ok', 'trade': trade})
+
+
+async def update_handler(request):
+    apply_update(request.query)
+    return json_response({'status': 'ok'})
+
+
+async def ws_handler(request):
+    """WebSocket推送: 连接时发送完整状态, 之后只推送增量"""
+    ws = web.WebSocketResponse(heartbeat=30)
+    await ws.prepare(request)
+    # 先订阅再取快照: 两者之间没有 await, 快照包含此前全部变动,
+    # 之后的增量任务排在快照发送之后, 不会丢失
+    data.subscribers.add(ws)
+    await ws.send_str(dumps({'type': 'status', 'data': data.get_status()}).decode())
+    try:
+        async for _ in ws:
+            pass
+    finally:
+        data.subscribers.discard(ws)
+    return ws
+
+
+def html_file_response(request, filepath: str) -> 'web.FileResponse':
+    """发送HTML文件, 客户端支持gzip时发送预压缩版本"""
+    if accepts_gzip(request.headers.get('Accept-Encoding', '')):
+        return web.FileResponse(filepath + '.gz', headers={
+            'Content-Encoding': 'gzip',
+            'Content-Type': 'text/html; charset=utf-8',
+        })
+    return web.FileResponse(filepath)
+
+
+async def dashboard_handler(request):
+    return html_file_response(request, 'templates/dashboard.html')
+
+
+async def chart_handler(request):
+    return html_file_response(request, 'templates/chart.html')
+
+
+def create_app() -> 'web.Application':
+    """创建aiohttp应用"""
+    app = web.Application()
+    app.router.add_get('/api/status', status_handler)
+    # 修改状态的接口不响应 HEAD (add_get 默认同时注册 HEAD)
+    app.router.add_get('/api/trade', trade_handler, allow_head=False)
+    app.router.add_get('/api/update', update_handler, allow_head=False)
+    app.router.add_get('/ws', ws_handler)
+    app.router.add_get('/', dashboard_handler)
+    app.router.add_get('/dashboard', dashboard_handler)
+    app.router.add_get('/chart', chart_handler)
+    return app
 
 
 def run_server(port=8080):
@@ -122,15 +460,18 @@ def run_server(port=8080):
     create_dashboard_html()
     create_chart_html()
     
-    server = ThreadedHTTPServer(('0.0.0.0', port), TradingDashboardHandler)
     print(f"="*60)
-    print(f"  TRADING DASHBOARD SERVER")
+    print(f"  TRADING DASHBOARD SERVER ({'aiohttp' if web else 'threaded'})")
     print(f"  http://localhost:{port}")
     print(f"  http://localhost:{port}/dashboard")
     print(f"  http://localhost:{port}/chart")
     print("="*60)
     
-    server.serve_forever()
+    if web is not None:
+        web.run_app(create_app(), host='0.0.0.0', port=port, print=None)
+    else:
+        server = ThreadedHTTPServer(('0.0.0.0', port), TradingDashboardHandler)
+        server.serve_forever()
 
 
 def create_dashboard_html():
@@ -429,8 +770,11 @@ def create_dashboard_html():
             document.getElementById('tradeCount').textContent = data.total_trades;
             
             // P&L Chart
-            pnlChart.data.labels = data.pnl_history.map(p => p.time);
-            pnlChart.data.datasets[0].data = data.pnl_history.map(p => p.pnl);
+            if (pnlReset) {
+                pnlChart.data.labels = data.pnl_history.map(p => p.time);
+                pnlChart.data.datasets[0].data = data.pnl_history.map(p => p.pnl);
+                pnlReset = false;
+            }
             pnlChart.data.datasets[0].borderColor = data.total_pnl >= 0 ? '#00ff88' : '#ff4757';
             pnlChart.update('none');
             
@@ -452,7 +796,7 @@ def create_dashboard_html():
             // Trades
             const tradeList = document.getElementById('tradeList');
             if (data.recent_trades.length > 0) {
-                tradeList.innerHTML = data.recent_trades.reverse().map(t => `
+                tradeList.innerHTML = [...data.recent_trades].reverse().map(t => `
                     <div class="trade-item">
                         <div class="trade-time">${t.time}</div>
                         <div class="trade-symbol">${t.symbol}</div>
@@ -489,12 +833,88 @@ def create_dashboard_html():
             try {
                 const response = await fetch('/api/status');
                 const data = await response.json();
-                updateUI(data);
+                pnlReset = true;
+                scheduleUI(data);
             } catch (e) {
                 console.error('Fetch error:', e);
             }
         }
         
+        // Coalesce updates into one repaint per frame; skip unchanged polled snapshots
+        let pending = null, frame = 0, dirty = false;
+        let last = {version: -1, total_trades: -1};
+        function scheduleUI(data, changed = false) {
+            pending = data;
+            dirty = dirty || changed;
+            if (frame) return;
+            frame = requestAnimationFrame(() => {
+                frame = 0;
+                const d = pending;
+                if (!dirty && d.version === last.version && d.total_trades === last.total_trades) return;
+                dirty = false;
+                last = {version: d.version, total_trades: d.total_trades};
+                updateUI(d);
+            });
+        }
+        
+        // Append one streamed P&L point; the chart is rebuilt only after a full snapshot
+        let pnlReset = true;
+        function pushPnlPoint(t, v) {
+            const labels = pnlChart.data.labels, values = pnlChart.data.datasets[0].data;
+            labels.push(t);
+            values.push(v);
+            if (labels.length > 50) {
+                labels.shift();
+                values.shift();
+            }
+        }
+        
+        // Apply a pushed status snapshot or delta
+        let state = null;
+        function applyMessage(msg) {
+            if (msg.type === 'status') {
+                state = msg.data;
+                pnlReset = true;
+            } else if (!state) {
+                return;
+            } else if (msg.type === 'pnl_point') {
+                state.pnl_history.push({time: msg.t, pnl: msg.v});
+                if (state.pnl_history.length > 50) state.pnl_history.shift();
+                state.total_pnl = msg.v;
+                pushPnlPoint(msg.t, msg.v);
+                return;  // the 'trade' message that follows schedules the repaint
+            } else if (msg.type === 'trade') {
+                state.recent_trades.push(msg.trade);
+                if (state.recent_trades.length > 10) state.recent_trades.shift();
+                state.total_trades = msg.total_trades;
+                state.total_pnl = msg.total_pnl;
+                state.timestamp = msg.timestamp;
+                state.version = msg.version;
+            } else if (msg.type === 'position') {
+                state.positions[msg.symbol] = msg.position;
+                state.timestamp = msg.timestamp;
+                state.version = msg.version;
+            } else if (msg.type === 'volatility') {
+                state.market_volatility = msg.market_volatility;
+                state.timestamp = msg.timestamp;
+                state.version = msg.version;
+            }
+            scheduleUI(state, true);  // pushed deltas always carry a change
+        }
+        
+        // Live updates over WebSocket; fall back to polling if unavailable
+        let pollTimer = null;
+        function connect() {
+            const ws = new WebSocket((location.protocol === 'https:' ? 'wss://' : 'ws://') + location.host + '/ws');
+            ws.onmessage = e => applyMessage(JSON.parse(e.data));
+            ws.onclose = () => {
+                if (!pollTimer) {
+                    fetchData();
+                    pollTimer = setInterval(fetchData, 2000);  // Update every 2 seconds
+                }
+            };
+        }
+        
         // Simulate trading (for demo)
         function simulateTrading() {
             fetch('/api/trade');
@@ -503,15 +923,13 @@ def create_dashboard_html():
         // Initialize
         document.addEventListener('DOMContentLoaded', () => {
             initCharts();
-            fetchData();
-            setInterval(fetchData, 2000);  // Update every 2 seconds
+            connect();
         });
     </script>
 </body>
 </html>'''
     
-    with open('templates/dashboard.html', 'w', encoding='utf-8') as f:
-        f.write(html)
+    write_template('templates/dashboard.html', html)
 
 
 def create_chart_html():
@@ -671,49 +1089,128 @@ def create_chart_html():
             try {
                 const r = await fetch('/api/status');
                 const d = await r.json();
-                
-                document.getElementById('pnl').textContent = (d.total_pnl >= 0 ? '+' : '') + '$' + d.total_pnl.toFixed(2);
-                document.getElementById('pnl').className = 'stat-value ' + (d.total_pnl >= 0 ? 'positive' : 'negative');
-                document.getElementById('trades').textContent = d.total_trades;
-                
+                pnlReset = true;
+                scheduleUI(d);
+            } catch (e) { console.error(e); }
+        }
+        
+        function render(d) {
+            document.getElementById('pnl').textContent = (d.total_pnl >= 0 ? '+' : '') + '$' + d.total_pnl.toFixed(2);
+            document.getElementById('pnl').className = 'stat-value ' + (d.total_pnl >= 0 ? 'positive' : 'negative');
+            document.getElementById('trades').textContent = d.total_trades;
+            
+            if (pnlReset) {
                 pnlChart.data.labels = d.pnl_history.map(p => p.time);
                 pnlChart.data.datasets[0].data = d.pnl_history.map(p => p.pnl);
-                pnlChart.data.datasets[0].borderColor = d.total_pnl >= 0 ? '#00ff88' : '#ff4757';
-                pnlChart.update('none');
-                
-                const wins = d.recent_trades.filter(t => t.pnl > 0).length;
-                const rate = d.total_trades > 0 ? (wins / d.total_trades * 100).toFixed(0) : 0;
-                document.getElementById('winrate').textContent = rate + '%';
-                
-                // Position distribution
-                let long = 0, short = 0;
-                Object.values(d.positions).forEach(p => {
-                    if (p.direction === 'LONG') long++;
-                    else short++;
-                });
-                pieChart.data.datasets[0].data = [long, short, 5 - long - short];
-                pieChart.update('none');
-                
-                // Trade bars
-                tradeChart.data.labels = d.recent_trades.map(t => t.symbol + ' ' + t.time);
-                tradeChart.data.datasets[0].data = d.recent_trades.map(t => t.pnl);
-                tradeChart.data.datasets[0].backgroundColor = d.recent_trades.map(t => t.pnl >= 0 ? '#00ff88' : '#ff4757');
-                tradeChart.update('none');
-                
-            } catch (e) { console.error(e); }
+                pnlReset = false;
+            }
+            pnlChart.data.datasets[0].borderColor = d.total_pnl >= 0 ? '#00ff88' : '#ff4757';
+            pnlChart.update('none');
+            
+            const wins = d.recent_trades.filter(t => t.pnl > 0).length;
+            const rate = d.total_trades > 0 ? (wins / d.total_trades * 100).toFixed(0) : 0;
+            document.getElementById('winrate').textContent = rate + '%';
+            
+            // Position distribution
+            let long = 0, short = 0;
+            Object.values(d.positions).forEach(p => {
+                if (p.direction === 'LONG') long++;
+                else short++;
+            });
+            pieChart.data.datasets[0].data = [long, short, 5 - long - short];
+            pieChart.update('none');
+            
+            // Trade bars
+            tradeChart.data.labels = d.recent_trades.map(t => t.symbol + ' ' + t.time);
+            tradeChart.data.datasets[0].data = d.recent_trades.map(t => t.pnl);
+            tradeChart.data.datasets[0].backgroundColor = d.recent_trades.map(t => t.pnl >= 0 ? '#00ff88' : '#ff4757');
+            tradeChart.update('none');
+        }
+        
+        // Coalesce updates into one repaint per frame; skip unchanged polled snapshots
+        let pending = null, frame = 0, dirty = false;
+        let last = {version: -1, total_trades: -1};
+        function scheduleUI(data, changed = false) {
+            pending = data;
+            dirty = dirty || changed;
+            if (frame) return;
+            frame = requestAnimationFrame(() => {
+                frame = 0;
+                const d = pending;
+                if (!dirty && d.version === last.version && d.total_trades === last.total_trades) return;
+                dirty = false;
+                last = {version: d.version, total_trades: d.total_trades};
+                render(d);
+            });
+        }
+        
+        // Append one streamed P&L point; the chart is rebuilt only after a full snapshot
+        let pnlReset = true;
+        function pushPnlPoint(t, v) {
+            const labels = pnlChart.data.labels, values = pnlChart.data.datasets[0].data;
+            labels.push(t);
+            values.push(v);
+            if (labels.length > 50) {
+                labels.shift();
+                values.shift();
+            }
+        }
+        
+        // Apply a pushed status snapshot or delta
+        let state = null;
+        function applyMessage(msg) {
+            if (msg.type === 'status') {
+                state = msg.data;
+                pnlReset = true;
+            } else if (!state) {
+                return;
+            } else if (msg.type === 'pnl_point') {
+                state.pnl_history.push({time: msg.t, pnl: msg.v});
+                if (state.pnl_history.length > 50) state.pnl_history.shift();
+                state.total_pnl = msg.v;
+                pushPnlPoint(msg.t, msg.v);
+                return;  // the 'trade' message that follows schedules the repaint
+            } else if (msg.type === 'trade') {
+                state.recent_trades.push(msg.trade);
+                if (state.recent_trades.length > 10) state.recent_trades.shift();
+                state.total_trades = msg.total_trades;
+                state.total_pnl = msg.total_pnl;
+                state.timestamp = msg.timestamp;
+                state.version = msg.version;
+            } else if (msg.type === 'position') {
+                state.positions[msg.symbol] = msg.position;
+                state.timestamp = msg.timestamp;
+                state.version = msg.version;
+            } else if (msg.type === 'volatility') {
+                state.market_volatility = msg.market_volatility;
+                state.timestamp = msg.timestamp;
+                state.version = msg.version;
+            }
+            scheduleUI(state, true);  // pushed deltas always carry a change
+        }
+        
+        // Live updates over WebSocket; fall back to polling if unavailable
+        let pollTimer = null;
+        function connect() {
+            const ws = new WebSocket((location.protocol === 'https:' ? 'wss://' : 'ws://') + location.host + '/ws');
+            ws.onmessage = e => applyMessage(JSON.parse(e.data));
+            ws.onclose = () => {
+                if (!pollTimer) {
+                    update();
+                    pollTimer = setInterval(update, 2000);
+                }
+            };
         }
         
         document.addEventListener('DOMContentLoaded', () => {
             initCharts();
-            update();
-            setInterval(update, 2000);
+            connect();
         });
     </script>
 </body>
 </html>'''
     
-    with open('templates/chart.html', 'w', encoding='utf-8') as f:
-        f.write(html)
+    write_template('templates/chart.html', html)
 
 
 if __name__ == '__main__':
@@ -1,150 +1,167 @@
 """
 Trading Report System - Beautiful HTML + Telegram Formats
 """
+import asyncio
 import json
 import os
+import re
+import textwrap
+import time
+from collections import deque
+from dataclasses import dataclass
+from itertools import islice
+from pathlib import Path
 from datetime import datetime
-from typing import Dict, List
+from typing import Dict, Iterable, Iterator, List, Sequence, Tuple, Union
+import numpy as np
 
+try:
+    import orjson
 
-class ReportFormatter:
-    """美化报告格式"""
-    
-    @staticmethod
-    def format_currency(amount: float) -> str:
-        """格式化货币"""
-        if amount >= 0:
-            return f"${amount:,.2f}"
-        else:
-            return f"-${abs(amount):,.2f}"
-    
-    @staticmethod
-    def format_pnl(pnl: float) -> str:
-        """格式化盈亏"""
-        if pnl >= 0:
-            return f"[GREEN]+${pnl:,.2f}[/GREEN]"
-        else:
-            return f"[RED]-${abs(pnl):,.2f}[/RED]"
-    
-    @staticmethod
-    def generate_html_report(
-        account_balance: float,
-        positions: Dict,
-        trades: List[Dict],
-        daily_pnl: float = 0,
-        total_pnl: float = 0
-    ) -> str:
-        """生成美观的HTML报告"""
-        
-        # 头部
-        header = f"""
-<!DOCTYPE html>
-<html lang="en">
-<head>
-    <meta charset="UTF-8">
-    <meta name="viewport" content="width=device-width, initial-scale=1.0">
-    <title>Trading Report</title>
-    <style>
-        * {{ margin: 0; padding: 0; box-sizing: border-box; }}
-        body {{ 
+    def dumps(obj) -> bytes:
+        return orjson.dumps(obj)
+
+    loads = orjson.loads
+except ImportError:  # orjson可选, 退回标准库
+    def dumps(obj) -> bytes:
+        return json.dumps(obj).encode()
+
+    loads = json.loads
+
+try:
+    import requests
+except ImportError:  # 未安装requests时Telegram发送不可用
+    requests = None
+
+try:
+    import aiohttp
+except ImportError:  # 未安装aiohttp时异步发送退回线程中的同步请求
+    aiohttp = None
+
+# Telegram Bot API 限额: 每个会话每分钟约20条
+TG_RATE_LIMIT = 20
+TG_RATE_WINDOW = 60.0
+TG_MAX_RETRIES = 3
+
+# Telegram 消息的固定部分, 模块加载时拼好; 每次只 format_map 动态字段
+_SEP = "━" * 27 + "\n"
+_TG_HEAD = f"{_SEP}📈 [B]VOLATILITY TRADING[/B]\n{_SEP}\n"
+_TG_SUMMARY = (
+    "💰 [B]Account:[/B] {acct}\n"
+    "{emoji} [B]Daily P&L:[/B] {pnl}\n"
+    "📊 [B]Positions:[/B] {positions}\n"
+    "📝 [B]Trades:[/B] {trades}\n"
+    f"\n{_SEP}📋 [B]POSITIONS[/B]\n{_SEP}"
+)
+_TG_LAST = f"\n{_SEP}📝 [B]LAST TRADE[/B]\n{_SEP}" + "{symbol} {action} {quantity} @ {price}\n"
+_TG_TAIL = _SEP + "🕐 {ts}\n"
+
+# 已解析的配置文件: path -> (st_mtime_ns, dict); 文件未变时免去重新读取和解析
+_cfg_cache: Dict[str, Tuple[int, dict]] = {}
+
+
+# 报告样式: 内嵌时原样放进 <style>, 落盘时写成同目录的 report.css 供所有报告共用
+_CSS = """
+        * { margin: 0; padding: 0; box-sizing: border-box; }
+        body { 
             font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, sans-serif;
             background: linear-gradient(135deg, #1a1a2e 0%, #16213e 100%);
             min-height: 100vh;
             padding: 20px;
             color: #fff;
-        }}
-        .container {{ max-width: 900px; margin: 0 auto; }}
+        }
+        .container { max-width: 900px; margin: 0 auto; }
         
-        .header {{
+        .header {
             text-align: center;
             padding: 30px;
             background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
             border-radius: 16px;
             margin-bottom: 20px;
             box-shadow: 0 10px 40px rgba(102, 126, 234, 0.3);
-        }}
-        .header h1 {{ font-size: 28px; margin-bottom: 10px; }}
-        .header .subtitle {{ opacity: 0.8; font-size: 14px; }}
+        }
+        .header h1 { font-size: 28px; margin-bottom: 10px; }
+        .header .subtitle { opacity: 0.8; font-size: 14px; }
         
-        .summary-grid {{
+        .summary-grid {
             display: grid;
             grid-template-columns: repeat(auto-fit, minmax(150px, 1fr));
             gap: 15px;
             margin-bottom: 25px;
-        }}
-        .summary-card {{
+        }
+        .summary-card {
             background: rgba(255,255,255,0.1);
             backdrop-filter: blur(10px);
             border-radius: 12px;
             padding: 20px;
             text-align: center;
             border: 1px solid rgba(255,255,255,0.1);
-        }}
-        .summary-card .label {{ font-size: 12px; opacity: 0.7; margin-bottom: 8px; text-transform: uppercase; }}
-        .summary-card .value {{ font-size: 24px; font-weight: bold; }}
-        .summary-card .value.positive {{ color: #00ff88; }}
-        .summary-card .value.negative {{ color: #ff4757; }}
-        .summary-card .value.neutral {{ color: #00d4ff; }}
-        
-        .section {{
+        }
+        .summary-card .label { font-size: 12px; opacity: 0.7; margin-bottom: 8px; text-transform: uppercase; }
+        .summary-card .value { font-size: 24px; font-weight: bold; }
+        .summary-card .value.positive { color: #00ff88; }
+        .summary-card .value.negative { color: #ff4757; }
+        .summary-card .value.neutral { color: #00d4ff; }
+        
+        .section {
             background: rgba(255,255,255,0.05);
             border-radius: 16px;
             padding: 20px;
             margin-bottom: 20px;
             border: 1px solid rgba(255,255,255,0.1);
-        }}
-        .section h2 {{ font-size: 18px; margin-bottom: 15px; padding-bottom: 10px; border-bottom: 1px solid rgba(255,255,255,0.1); }}
+        }
+        .section h2 { font-size: 18px; margin-bottom: 15px; padding-bottom: 10px; border-bottom: 1px solid rgba(255,255,255,0.1); }
         
-        .positions-table {{
+        .positions-table {
             width: 100%;
             border-collapse: separate;
             border-spacing: 0 8px;
-        }}
-        .positions-table th {{
+        }
+        .positions-table th {
             text-align: left;
             padding: 12px 15px;
             font-size: 11px;
             text-transform: uppercase;
             opacity: 0.6;
-        }}
-        .positions-table td {{
+        }
+        .positions-table td {
             padding: 15px;
             background: rgba(255,255,255,0.05);
-        }}
-        .positions-table tr td:first-child {{
+        }
+        .positions-table tr td:first-child {
             border-radius: 8px 0 0 8px;
-        }}
-        .positions-table tr td:last-child {{
+        }
+        .positions-table tr td:last-child {
             border-radius: 0 8px 8px 0;
-        }}
+        }
         
-        .symbol {{ font-weight: bold; font-size: 16px; }}
-        .direction {{
+        .symbol { font-weight: bold; font-size: 16px; }
+        .direction {
             display: inline-block;
             padding: 4px 10px;
             border-radius: 20px;
             font-size: 12px;
             font-weight: bold;
-        }}
-        .direction.long {{ background: rgba(0, 255, 136, 0.2); color: #00ff88; }}
-        .direction.short {{ background: rgba(255, 71, 87, 0.2); color: #ff4757; }}
+        }
+        .direction.long { background: rgba(0, 255, 136, 0.2); color: #00ff88; }
+        .direction.short { background: rgba(255, 71, 87, 0.2); color: #ff4757; }
         
-        .price {{ font-family: 'SF Mono', Monaco, monospace; }}
-        .pnl.positive {{ color: #00ff88; }}
-        .pnl.negative {{ color: #ff4757; }}
+        .price { font-family: 'SF Mono', Monaco, monospace; }
+        .pnl.positive { color: #00ff88; }
+        .pnl.negative { color: #ff4757; }
         
-        .trade-item {{
+        .trade-item {
             display: flex;
             align-items: center;
             padding: 12px;
             background: rgba(255,255,255,0.03);
             border-radius: 8px;
             margin-bottom: 8px;
-        }}
-        .trade-item:last-child {{ margin-bottom: 0; }}
-        .trade-time {{ font-size: 12px; opacity: 0.5; min-width: 80px; }}
-        .trade-symbol {{ font-weight: bold; min-width: 60px; }}
-        .trade-action {{
+        }
+        .trade-item:last-child { margin-bottom: 0; }
+        .trade-time { font-size: 12px; opacity: 0.5; min-width: 80px; }
+        .trade-symbol { font-weight: bold; min-width: 60px; }
+        .trade-action {
             padding: 4px 10px;
             border-radius: 4px;
             font-size: 12px;
@@ -152,81 +169,68 @@ class ReportFormatter:
             min-width: 50px;
             text-align: center;
             margin: 0 15px;
-        }}
-        .trade-action.buy {{ background: rgba(0, 255, 136, 0.2); color: #00ff88; }}
-        .trade-action.short {{ background: rgba(255, 71, 87, 0.2); color: #ff4757; }}
-        .trade-qty {{ opacity: 0.7; }}
-        .trade-price {{ margin-left: auto; font-family: 'SF Mono', Monaco, monospace; }}
+        }
+        .trade-action.buy { background: rgba(0, 255, 136, 0.2); color: #00ff88; }
+        .trade-action.short { background: rgba(255, 71, 87, 0.2); color: #ff4757; }
+        .trade-qty { opacity: 0.7; }
+        .trade-price { margin-left: auto; font-family: 'SF Mono', Monaco, monospace; }
         
-        .footer {{
+        .footer {
             text-align: center;
             padding: 20px;
             opacity: 0.5;
             font-size: 12px;
-        }}
-    </style>
+        }
+    """
+REPORT_CSS = "report.css"
+# 报告输出目录, 可用环境变量 REPORT_DIR 覆盖; 首次保存时创建一次
+_REPORT_DIR = Path(os.environ.get(
+    "REPORT_DIR", "C:/Users/lulg/.openclaw/workspace/volatility_trading_system/reports"
+))
+_REPORT_DIR_READY = False
+RECENT_TRADES = 5  # HTML报告展示的最近交易笔数
+
+# 方向/动作 -> (图标, CSS类); 查表代替逐行的条件判断, 未知值按空头显示
+_DIR_META = {"LONG": ("▲", "long"), "SHORT": ("▼", "short")}
+_ACTION_META = {"BUY": ("▲", "buy"), "LONG": ("▲", "buy")}
+_ACTION_DEFAULT = ("▼", "short")
+_STYLE_INLINE: bytes = f"<style>{_CSS}</style>".encode('utf-8')
+
+# HTML报告骨架, $name 为动态字段
+_HTML_SHELL = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>Trading Report</title>
+    $style
 </head>
 <body>
     <div class="container">
         <div class="header">
             <h1>📈 Volatility Trading Report</h1>
-            <div class="subtitle">{datetime.now().strftime('%Y-%m-%d %H:%M')}</div>
+            <div class="subtitle">$timestamp</div>
         </div>
-"""
-        
-        # 账户摘要
-        pnl_class = "positive" if daily_pnl >= 0 else "negative"
-        pnl_icon = "🟢" if daily_pnl >= 0 else "🔴"
-        
-        summary = f"""
+
         <div class="summary-grid">
             <div class="summary-card">
                 <div class="label">Account Balance</div>
-                <div class="value neutral">{ReportFormatter.format_currency(account_balance)}</div>
+                <div class="value neutral">$balance</div>
             </div>
             <div class="summary-card">
                 <div class="label">Daily P&L</div>
-                <div class="value {pnl_class}">{pnl_icon} {ReportFormatter.format_currency(daily_pnl)}</div>
+                <div class="value $pnl_class">$pnl_icon $daily_pnl</div>
             </div>
             <div class="summary-card">
                 <div class="label">Positions</div>
-                <div class="value neutral">{len(positions)}</div>
+                <div class="value neutral">$position_count</div>
             </div>
             <div class="summary-card">
                 <div class="label">Trades Today</div>
-                <div class="value neutral">{len(trades)}</div>
+                <div class="value neutral">$trade_count</div>
             </div>
         </div>
-"""
-        
-        # 持仓表格
-        positions_html = ""
-        if positions:
-            for sym, pos in positions.items():
-                direction = pos.get("direction", "")
-                entry = pos.get("avg_cost", pos.get("entry", 0))
-                current = pos.get("current_price", entry)
-                qty = pos.get("quantity", 0)
-                
-                pnl = (current - entry) * qty if direction == "LONG" else (entry - current) * qty
-                pnl_class = "positive" if pnl >= 0 else "negative"
-                direction_class = "long" if direction == "LONG" else "short"
-                direction_icon = "▲" if direction == "LONG" else "▼"
-                
-                positions_html += f"""
-                <tr>
-                    <td><span class="symbol">{sym}</span></td>
-                    <td><span class="direction {direction_class}">{direction_icon} {direction}</span></td>
-                    <td class="price">{qty}</td>
-                    <td class="price">{ReportFormatter.format_currency(entry)}</td>
-                    <td class="price">{ReportFormatter.format_currency(current)}</td>
-                    <td class="price {pnl_class}">{ReportFormatter.format_currency(pnl)}</td>
-                </tr>
-                """
-        else:
-            positions_html = "<tr><td colspan='6' style='text-align:center;opacity:0.5;'>No active positions</td></tr>"
-        
-        positions_section = f"""
+
         <div class="section">
             <h2>📊 Current Positions</h2>
             <table class="positions-table">
@@ -240,41 +244,15 @@ class ReportFormatter:
                         <th>P&L</th>
                     </tr>
                 </thead>
-                <tbody>{positions_html}</tbody>
+                <tbody>$positions_html</tbody>
             </table>
         </div>
-"""
-        
-        # 最近交易
-        trades_html = ""
-        for trade in trades[-5:]:
-            sym = trade.get("symbol", "")
-            action = trade.get("action", "")
-            qty = trade.get("quantity", 0)
-            price = trade.get("price", 0)
-            time = trade.get("time", "")[11:19]
-            
-            action_class = "buy" if action in ["BUY", "LONG"] else "short"
-            action_icon = "▲" if action in ["BUY", "LONG"] else "▼"
-            
-            trades_html += f"""
-            <div class="trade-item">
-                <div class="trade-time">{time}</div>
-                <div class="trade-symbol">{sym}</div>
-                <div class="trade-action {action_class}">{action_icon} {action}</div>
-                <div class="trade-qty">{qty} shares</div>
-                <div class="trade-price">{ReportFormatter.format_currency(price)}</div>
-            </div>
-            """
-        
-        trades_section = f"""
+
         <div class="section">
             <h2>📝 Recent Trades</h2>
-            {trades_html if trades_html else '<div style="opacity:0.5;text-align:center;padding:20px;">No trades today</div>'}
+            $trades_html
         </div>
-"""
-        
-        footer = """
+
         <div class="footer">
             🤖 Automated Trading System • Paper Account
         </div>
@@ -282,61 +260,237 @@ class ReportFormatter:
 </body>
 </html>
 """
-        
-        return header + summary + positions_section + trades_section + footer
+
+# 模块加载时把骨架切成静态段与字段名; 静态段 (表头、页脚等) 预先编码为UTF-8,
+# 流式写盘时原样写出, 只有动态字段和逐行片段需要 encode
+_shell_parts = re.split(r'\$(\w+)', _HTML_SHELL)
+_SHELL_TEXT: List[bytes] = [text.encode('utf-8') for text in _shell_parts[0::2]]
+_SHELL_FIELDS: List[str] = _shell_parts[1::2]
+_NO_POSITIONS: bytes = b"<tr><td colspan='6' style='text-align:center;opacity:0.5;'>No active positions</td></tr>"
+_NO_TRADES: bytes = b'<div style="opacity:0.5;text-align:center;padding:20px;">No trades today</div>'
+
+
+def _positions_to_arrays(positions: Dict) -> Tuple[List[tuple], List[float]]:
+    """持仓转成列数组 (SoA) 后一次向量化计算盈亏
+    
+    返回 (rows, pnls): rows 为 (symbol, direction, entry, current, qty) 元组, 与 pnls 一一对应
+    """
+    rows = []
+    for sym, pos in positions.items():
+        entry = pos.get("avg_cost", pos.get("entry", 0))
+        rows.append((sym, pos.get("direction", ""), entry, pos.get("current_price", entry), pos.get("quantity", 0)))
+    if not rows:
+        return rows, []
+    
+    _, directions, entries, currents, qtys = zip(*rows)
+    n = len(rows)
+    entries = np.fromiter(entries, float, n)
+    currents = np.fromiter(currents, float, n)
+    qtys = np.fromiter(qtys, float, n)
+    is_long = np.fromiter((d == "LONG" for d in directions), bool, n)
+    # 空头写成 entry-current 而不是乘 -1, 平价时得到 0.0 而非 -0.0
+    pnls = np.where(is_long, currents - entries, entries - currents) * qtys
+    return rows, pnls.tolist()
+
+
+@dataclass(slots=True)
+class PositionView:
+    """持仓的展示字段: 方向、盈亏和金额字符串只计算一次, HTML与Telegram报告共用"""
+    symbol: str
+    direction: str
+    qty: float
+    entry: float
+    current: float
+    pnl: float
+    entry_fmt: str
+    current_fmt: str
+    pnl_fmt: str
+    
+    @classmethod
+    def from_row(cls, symbol: str, direction: str, entry: float, current: float, qty: float, pnl: float) -> "PositionView":
+        fmt = ReportFormatter.format_currency
+        return cls(symbol, direction, qty, entry, current, pnl, fmt(entry), fmt(current), fmt(pnl))
+    
+    @classmethod
+    def from_dict(cls, symbol: str, pos: Dict) -> "PositionView":
+        """单个持仓更新时使用"""
+        rows, pnls = _positions_to_arrays({symbol: pos})
+        return cls.from_row(*rows[0], pnls[0])
+
+
+def recent_trades(trades: Sequence[Dict]) -> Sequence[Dict]:
+    """最近 RECENT_TRADES 笔交易
+    
+    调用方应以 deque(maxlen=RECENT_TRADES) 保存交易记录 (并把成交总数作为 trade_count 传给报告),
+    此时直接迭代不复制; 传入列表时只取尾部, 不复制整个前缀
+    """
+    if isinstance(trades, deque) and trades.maxlen is not None and trades.maxlen <= RECENT_TRADES:
+        return trades
+    return list(islice(reversed(trades), RECENT_TRADES))[::-1]
+
+
+def position_views(positions: Union[Dict, List[PositionView]]) -> List[PositionView]:
+    """持仓字典批量转 PositionView (盈亏向量化计算); 已是列表时原样返回"""
+    if isinstance(positions, list):
+        return positions
+    rows, pnls = _positions_to_arrays(positions)
+    return [PositionView.from_row(*row, pnl) for row, pnl in zip(rows, pnls)]
+
+
+def _position_rows(positions: Union[Dict, List[PositionView]]) -> Iterator[bytes]:
+    """持仓表格的逐行片段"""
+    if not positions:
+        yield _NO_POSITIONS
+        return
+    for p in position_views(positions):
+        pnl_class = "positive" if p.pnl >= 0 else "negative"
+        direction_icon, direction_class = _DIR_META.get(p.direction, _DIR_META["SHORT"])
+        
+        yield f"""
+                <tr>
+                    <td><span class="symbol">{p.symbol}</span></td>
+                    <td><span class="direction {direction_class}">{direction_icon} {p.direction}</span></td>
+                    <td class="price">{p.qty}</td>
+                    <td class="price">{p.entry_fmt}</td>
+                    <td class="price">{p.current_fmt}</td>
+                    <td class="price {pnl_class}">{p.pnl_fmt}</td>
+                </tr>
+                """.encode('utf-8')
+
+
+def _trade_rows(trades: Sequence[Dict]) -> Iterator[bytes]:
+    """最近交易的逐行片段"""
+    _fmt = ReportFormatter.format_currency
+    recent = recent_trades(trades)
+    for trade in recent:
+        sym = trade.get("symbol", "")
+        action = trade.get("action", "")
+        qty = trade.get("quantity", 0)
+        price = trade.get("price", 0)
+        time = trade.get("time", "")[11:19]
+        
+        action_icon, action_class = _ACTION_META.get(action, _ACTION_DEFAULT)
+        
+        yield f"""
+            <div class="trade-item">
+                <div class="trade-time">{time}</div>
+                <div class="trade-symbol">{sym}</div>
+                <div class="trade-action {action_class}">{action_icon} {action}</div>
+                <div class="trade-qty">{qty} shares</div>
+                <div class="trade-price">{_fmt(price)}</div>
+            </div>
+            """.encode('utf-8')
+    if not recent:
+        yield _NO_TRADES
+
+
+class ReportFormatter:
+    """美化报告格式"""
+    
+    @staticmethod
+    def format_currency(amount: float) -> str:
+        """格式化货币"""
+        return f"${amount:,.2f}" if amount >= 0 else f"-${-amount:,.2f}"
+    
+    @staticmethod
+    def format_pnl(pnl: float) -> str:
+        """格式化盈亏"""
+        return f"[GREEN]+${pnl:,.2f}[/GREEN]" if pnl >= 0 else f"[RED]-${-pnl:,.2f}[/RED]"
+    
+    @staticmethod
+    def iter_html_report(
+        account_balance: float,
+        positions: Union[Dict, List[PositionView]],
+        trades: Sequence[Dict],
+        daily_pnl: float = 0,
+        total_pnl: float = 0,
+        stylesheet: str = None,
+        now: datetime = None,
+        trade_count: int = None
+    ) -> Iterator[bytes]:
+        """逐段生成UTF-8编码的HTML报告 (静态段、字段、每行持仓/交易), 可直接流式写入文件
+        
+        positions 可以是持仓字典, 也可以是预先算好的 PositionView 列表;
+        stylesheet 为外部CSS路径时只输出 <link>, 否则内嵌样式 (单文件可直接发送);
+        now 为报告时间, 不传时取当前时间;
+        trade_count 为当日成交总数, 不传时用 len(trades) (trades 为有界 deque 时应显式传入)
+        """
+        _fmt = ReportFormatter.format_currency  # 局部别名, 免去属性查找
+        if now is None:
+            now = datetime.now()
+        
+        # 每个字段对应一串 bytes 片段; 两个列表字段是逐行生成器
+        fields = {
+            "style": (f'<link rel="stylesheet" href="{stylesheet}">'.encode('utf-8') if stylesheet else _STYLE_INLINE,),
+            "timestamp": (now.strftime('%Y-%m-%d %H:%M').encode('utf-8'),),
+            "balance": (_fmt(account_balance).encode('utf-8'),),
+            "pnl_class": (b"positive" if daily_pnl >= 0 else b"negative",),
+            "pnl_icon": ("🟢".encode('utf-8') if daily_pnl >= 0 else "🔴".encode('utf-8'),),
+            "daily_pnl": (_fmt(daily_pnl).encode('utf-8'),),
+            "position_count": (b"%d" % len(positions),),
+            "trade_count": (b"%d" % (len(trades) if trade_count is None else trade_count),),
+            "positions_html": _position_rows(positions),
+            "trades_html": _trade_rows(trades),
+        }
+        for text, field in zip(_SHELL_TEXT, _SHELL_FIELDS):
+            yield text
+            yield from fields[field]
+        yield _SHELL_TEXT[-1]
+    
+    @staticmethod
+    def generate_html_report(
+        account_balance: float,
+        positions: Union[Dict, List[PositionView]],
+        trades: Sequence[Dict],
+        daily_pnl: float = 0,
+        total_pnl: float = 0,
+        now: datetime = None,
+        trade_count: int = None
+    ) -> str:
+        """生成美观的HTML报告 (片段一次 join, 线性于输出长度)"""
+        return b"".join(ReportFormatter.iter_html_report(
+            account_balance, positions, trades, daily_pnl, total_pnl, now=now, trade_count=trade_count
+        )).decode('utf-8')
     
     @staticmethod
     def generate_telegram_message(
         account_balance: float,
-        positions: Dict,
-        trades: List[Dict],
-        daily_pnl: float = 0
+        positions: Union[Dict, List[PositionView]],
+        trades: Sequence[Dict],
+        daily_pnl: float = 0,
+        now: datetime = None,
+        trade_count: int = None
     ) -> str:
-        """生成简洁的 Telegram 消息"""
-        
-        pnl_emoji = "[GREEN]▲[/GREEN]" if daily_pnl >= 0 else "[RED]▼[/RED]"
-        pnl_str = ReportFormatter.format_currency(daily_pnl)
-        
-        msg = f"""━━━━━━━━━━━━━━━━━━━━━━━━━━━
-📈 [B]VOLATILITY TRADING[/B]
-━━━━━━━━━━━━━━━━━━━━━━━━━━━
-
-💰 [B]Account:[/B] {ReportFormatter.format_currency(account_balance)}
-{pnl_emoji} [B]Daily P&L:[/B] {pnl_str}
-📊 [B]Positions:[/B] {len(positions)}
-📝 [B]Trades:[/B] {len(trades)}
-
-━━━━━━━━━━━━━━━━━━━━━━━━━━━
-📋 [B]POSITIONS[/B]
-━━━━━━━━━━━━━━━━━━━━━━━━━━━
-"""
-        
-        for sym, pos in positions.items():
-            direction = pos.get("direction", "")
-            entry = pos.get("avg_cost", pos.get("entry", 0))
-            current = pos.get("current_price", entry)
-            qty = pos.get("quantity", 0)
-            
-            pnl = (current - entry) * qty if direction == "LONG" else (entry - current) * qty
-            pnl_emoji = "[GREEN]+[/GREEN]" if pnl >= 0 else "[RED]-[/RED]"
-            direction_icon = "▲" if direction == "LONG" else "▼"
+        """生成简洁的 Telegram 消息; trade_count 含义同 iter_html_report"""
+        _fmt = ReportFormatter.format_currency
+        now_str = (now or datetime.now()).strftime('%Y-%m-%d %H:%M')
+        
+        msg_parts = [_TG_HEAD, _TG_SUMMARY.format_map({
+            "acct": _fmt(account_balance),
+            "emoji": "[GREEN]▲[/GREEN]" if daily_pnl >= 0 else "[RED]▼[/RED]",
+            "pnl": _fmt(daily_pnl),
+            "positions": len(positions),
+            "trades": len(trades) if trade_count is None else trade_count,
+        })]
+        
+        for p in position_views(positions):
+            pnl_emoji = "[GREEN]+[/GREEN]" if p.pnl >= 0 else "[RED]-[/RED]"
+            direction_icon = _DIR_META.get(p.direction, _DIR_META["SHORT"])[0]
             
-            msg += f"{direction_icon} {sym}: {qty}@{ReportFormatter.format_currency(entry)} → {ReportFormatter.format_currency(current)} {pnl_emoji}{abs(pnl):,.2f}\n"
+            msg_parts.append(f"{direction_icon} {p.symbol}: {p.qty}@{p.entry_fmt} → {p.current_fmt} {pnl_emoji}{abs(p.pnl):,.2f}\n")
         
         if trades:
             last = trades[-1]
-            msg += f"""
-━━━━━━━━━━━━━━━━━━━━━━━━━━━
-📝 [B]LAST TRADE[/B]
-━━━━━━━━━━━━━━━━━━━━━━━━━━━
-{last.get('symbol', '')} {last.get('action', '')} {last.get('quantity', 0)} @ {ReportFormatter.format_currency(last.get('price', 0))}
-"""
+            msg_parts.append(_TG_LAST.format_map({
+                "symbol": last.get('symbol', ''),
+                "action": last.get('action', ''),
+                "quantity": last.get('quantity', 0),
+                "price": _fmt(last.get('price', 0)),
+            }))
         
-        msg += f"""━━━━━━━━━━━━━━━━━━━━━━━━━━━
-🕐 {datetime.now().strftime('%Y-%m-%d %H:%M')}
-"""
+        msg_parts.append(_TG_TAIL.format_map({"ts": now_str}))
         
-        return msg
+        return "".join(msg_parts)
     
     @staticmethod
     def generate_short_sms() -> str:
@@ -350,6 +504,17 @@ class ReportSender:
     def __init__(self):
         self.config = {}
         self.enabled_channels = []
+        self._tg_url = ""
+        self._tg_sent = deque(maxlen=TG_RATE_LIMIT)  # 最近发送时刻 (monotonic), 滑动窗口限速
+        # 复用同一HTTPS连接, 避免每次发送都重新TCP+TLS握手
+        self._session = requests.Session() if requests is not None else None
+        if self._session is not None:
+            self._session.headers.update({'Content-Type': 'application/json'})
+        # aiohttp 会话绑定在创建它的事件循环上: 懒创建并复用, 同步 send_all 使用私有循环保持复用
+        self._aio_session = None
+        self._aio_loop = None
+        self._tg_lock = None   # 与会话同属一个事件循环, 保证限速检查与记录是原子的
+        self._loop = None
     
     def load_config(self, config_file: str = "report_config.json") -> dict:
         """加载配置"""
@@ -359,16 +524,24 @@ class ReportSender:
             "sms": {"enabled": False, "method": "telegram"}
         }
         
-        if os.path.exists(config_file):
-            with open(config_file, 'r') as f:
-                user_config = json.load(f)
-                default_config.update(user_config)
+        try:
+            mtime = os.stat(config_file).st_mtime_ns
+        except FileNotFoundError:
+            mtime = None
+        if mtime is not None:
+            cached = _cfg_cache.get(config_file)
+            if cached is None or cached[0] != mtime:
+                with open(config_file, 'rb') as f:
+                    cached = _cfg_cache[config_file] = (mtime, loads(f.read()))
+            default_config.update(cached[1])
         
         self.config = default_config
         self.enabled_channels = []
         
         if self.config.get("telegram", {}).get("enabled"):
             self.enabled_channels.append("telegram")
+        bot_token = self.config.get("telegram", {}).get("bot_token", "")
+        self._tg_url = f"https://api.telegram.org/bot{bot_token}/sendMessage" if bot_token else ""
         if self.config.get("email", {}).get("enabled"):
             self.enabled_channels.append("email")
         
@@ -379,65 +552,226 @@ class ReportSender:
         if "telegram" not in self.enabled_channels:
             return False
         
-        tg = self.config.get("telegram", {})
-        bot_token = tg.get("bot_token", "")
-        chat_id = tg.get("chat_id", "")
+        chat_id = self.config.get("telegram", {}).get("chat_id", "")
         
-        if not bot_token or not chat_id:
+        if not self._tg_url or not chat_id:
             print("[Telegram] Not configured")
             return False
         
+        if self._session is None:
+            print("[Telegram Error] requests is not installed")
+            return False
+        
         try:
-            import requests
-            url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
-            data = {
+            body = dumps({
                 "chat_id": chat_id,
                 "text": message,
                 "parse_mode": "HTML"
-            }
-            resp = requests.post(url, json=data, timeout=10)
+            })
+            # 已序列化的bytes直接作为请求体, Content-Type 由会话头提供
+            resp = self._session.post(self._tg_url, data=body, timeout=10)
             return resp.status_code == 200
         except Exception as e:
             print(f"[Telegram Error] {e}")
             return False
     
-    def send_all(
+    async def _tg_throttle(self):
+        """窗口内已发满 TG_RATE_LIMIT 条时, 等到最早一条移出窗口
+        
+        持锁完成 检查→等待→记录, 并发的发送依次占用窗口名额
+        """
+        async with self._tg_lock:
+            sent = self._tg_sent
+            if len(sent) == sent.maxlen:
+                wait = sent[0] + TG_RATE_WINDOW - time.monotonic()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+            sent.append(time.monotonic())
+    
+    async def _send_telegram_async(self, session, message: str) -> bool:
+        """异步发送 Telegram; 遇到429按 retry_after 指数退避重试"""
+        chat_id = self.config.get("telegram", {}).get("chat_id", "")
+        
+        if not self._tg_url or not chat_id:
+            print("[Telegram] Not configured")
+            return False
+        
+        data = dumps({
+            "chat_id": chat_id,
+            "text": message,
+            "parse_mode": "HTML"
+        })
+        delay = 1.0
+        for attempt in range(TG_MAX_RETRIES):
+            await self._tg_throttle()
+            try:
+                async with session.post(
+                    self._tg_url, data=data, headers={'Content-Type': 'application/json'},
+                    timeout=aiohttp.ClientTimeout(total=10),
+                ) as resp:
+                    if resp.status != 429:
+                        return resp.status == 200
+                    body = loads(await resp.read())
+            except Exception as e:
+                print(f"[Telegram Error] {e}")
+                return False
+            if attempt == TG_MAX_RETRIES - 1:
+                break  # 最后一次仍被限流: 不再空等
+            delay = max(delay, float(body.get("parameters", {}).get("retry_after", 0)))
+            await asyncio.sleep(delay)
+            delay *= 2
+        print("[Telegram Error] rate limited")
+        return False
+    
+    async def _aio_client(self):
+        """当前事件循环上复用的 aiohttp 会话; 换了事件循环时重建, 并在原循环上关闭旧会话
+        
+        会话只能在创建它的事件循环上关闭: 在 asyncio.run 这类临时循环中调用
+        send_all_async 后, 应在该循环结束前 await aclose(), 否则旧会话无法再干净关闭
+        """
+        loop = asyncio.get_running_loop()
+        session = self._aio_session
+        if session is not None and not session.closed and self._aio_loop is loop:
+            return session
+        # 先同步换上新会话, 并发的调用方不会各自重建
+        old_loop = self._aio_loop
+        self._aio_session = aiohttp.ClientSession()
+        self._aio_loop = loop
+        self._tg_lock = asyncio.Lock()
+        new_session = self._aio_session
+        if session is not None and not session.closed and not old_loop.is_closed():
+            if old_loop.is_running():  # 原循环在其他线程中运行
+                await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(session.close(), old_loop))
+            else:  # 空闲的循环 (如 send_all 的私有循环) 可在工作线程里驱动
+                await asyncio.to_thread(old_loop.run_until_complete, session.close())
+        return new_session
+    
+    async def _telegram_async(self, message: str) -> bool:
+        if aiohttp is None:
+            return await asyncio.to_thread(self.send_telegram, message)
+        return await self._send_telegram_async(await self._aio_client(), message)
+    
+    async def aclose(self):
+        """关闭复用的 aiohttp 会话; 需在创建会话的事件循环中 await"""
+        if self._aio_session is not None:
+            await self._aio_session.close()
+            self._aio_session = None
+    
+    def close(self):
+        """关闭所有复用的连接 (同步调用方使用)"""
+        session, loop = self._aio_session, self._aio_loop
+        if session is not None and not session.closed and not loop.is_closed() and not loop.is_running():
+            loop.run_until_complete(session.close())
+        self._aio_session = None
+        if self._loop is not None:
+            self._loop.close()
+            self._loop = None
+        if self._session is not None:
+            self._session.close()
+    
+    async def send_all_async(
         self,
         html_report: str,
         telegram_msg: str,
         subject: str = "Trading Report"
     ) -> dict:
-        """发送到所有渠道"""
+        """并发发送到所有渠道
+        
+        复用的 aiohttp 会话属于当前事件循环; 在 asyncio.run 等临时循环中调用时, 结束前 await aclose()
+        """
         results = {}
         
+        channels = {}
         if "telegram" in self.enabled_channels:
-            if self.send_telegram(telegram_msg):
-                results["telegram"] = True
+            channels["telegram"] = self._telegram_async(telegram_msg)
         
-        # Email 暂时简化
-        if "email" in self.enabled_channels:
-            print(f"[Email] Would send: {subject}")
+        for name, ok in zip(channels, await asyncio.gather(*channels.values())):
+            if ok:
+                results[name] = True
+        
+        if "email" in self.enabled_channels and self._send_email(subject):
             results["email"] = True
         
         return results
+    
+    def _send_email(self, subject: str) -> bool:
+        # Email 暂时简化
+        print(f"[Email] Would send: {subject}")
+        return True
+    
+    def send_all(
+        self,
+        html_report: str,
+        telegram_msg: str,
+        subject: str = "Trading Report"
+    ) -> dict:
+        """发送到所有渠道
+        
+        在事件循环中调用时 (如 aiohttp 仪表板) 退回逐个同步发送; 异步代码应直接 await send_all_async
+        """
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+            return self._loop.run_until_complete(self.send_all_async(html_report, telegram_msg, subject))
+        
+        results = {}
+        if "telegram" in self.enabled_channels and self.send_telegram(telegram_msg):
+            results["telegram"] = True
+        if "email" in self.enabled_channels and self._send_email(subject):
+            results["email"] = True
+        return results
 
 
-def save_report(html_content: str, filename: str = None) -> str:
-    """保存报告"""
+def save_report(html_content: Union[str, Iterable[bytes]], filename: str = None, now: datetime = None) -> str:
+    """保存报告; html_content 可以是完整字符串, 也可以是 iter_html_report 的片段流"""
     if filename is None:
-        filename = f"report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.html"
+        filename = (now or datetime.now()).strftime('report_%Y%m%d_%H%M%S.html')
     
-    report_dir = "C:/Users/lulg/.openclaw/workspace/volatility_trading_system/reports"
-    os.makedirs(report_dir, exist_ok=True)
+    global _REPORT_DIR_READY
+    if not _REPORT_DIR_READY:
+        _REPORT_DIR.mkdir(parents=True, exist_ok=True)
+        # 共享样式表只写一次, 每份报告通过 <link> 引用
+        css_path = _REPORT_DIR / REPORT_CSS
+        if not css_path.exists():
+            css_path.write_text(textwrap.dedent(_CSS).lstrip('\n'), encoding='utf-8')
+        _REPORT_DIR_READY = True
     
-    filepath = os.path.join(report_dir, filename)
+    filepath = os.path.join(_REPORT_DIR, filename)
     
-    with open(filepath, 'w', encoding='utf-8') as f:
-        f.write(html_content)
+    if isinstance(html_content, str):
+        html_content = (html_content.encode('utf-8'),)
+    # 片段已是UTF-8 bytes, 二进制写入免去再次编码; 1 MiB 缓冲把小片段合并成少量系统调用
+    with open(filepath, 'wb', buffering=1 << 20) as f:
+        f.writelines(html_content)
     
     return filepath
 
 
+def build_and_save(
+    account_balance: float,
+    positions: Dict,
+    trades: Sequence[Dict],
+    daily_pnl: float = 0,
+    stylesheet: str = REPORT_CSS,
+    trade_count: int = None
+) -> Tuple[str, str]:
+    """生成并保存HTML报告, 同时生成 Telegram 消息; 返回 (文件路径, 消息)
+    
+    时间只取一次, 报告标题、文件名和消息时间戳一致; 持仓字段也只计算一次
+    """
+    now = datetime.now()
+    views = position_views(positions)
+    filepath = save_report(ReportFormatter.iter_html_report(
+        account_balance, views, trades, daily_pnl, stylesheet=stylesheet, now=now, trade_count=trade_count
+    ), now=now)
+    message = ReportFormatter.generate_telegram_message(
+        account_balance, views, trades, daily_pnl, now=now, trade_count=trade_count
+    )
+    return filepath, message
+
+
 if __name__ == "__main__":
     # 测试
     sample_positions = {
@@ -452,25 +786,15 @@ if __name__ == "__main__":
         {"time": "2026-02-11 21:55:35", "symbol": "TSLA", "action": "SHORT", "quantity": 46, "price": 428.80},
     ]
     
-    # HTML 报告
-    html = ReportFormatter.generate_html_report(
+    # HTML 报告 + Telegram 消息
+    filepath, telegram = build_and_save(
         account_balance=1000000,
         positions=sample_positions,
         trades=sample_trades,
         daily_pnl=40.50
     )
-    
-    filepath = save_report(html)
     print(f"[OK] HTML Report: {filepath}")
     
-    # Telegram 消息
-    telegram = ReportFormatter.generate_telegram_message(
-        account_balance=1000000,
-        positions=sample_positions,
-        trades=sample_trades,
-        daily_pnl=40.50
-    )
-    
     print("\n[Telegram Preview]")
     print(telegram)
     